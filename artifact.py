@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+
+import instrument
+from policy import PolicyTable
+
+
+# bump when the layout of the cache or of anything stored in it changes, so
+# old caches get rebuilt instead of loaded
+ARTIFACT_VERSION = 1
+
+# where the cache is kept by default
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '.ttt-cache')
+
+# files in the cache directory:
+#   manifest.json  -> version, hash of the data and ids of the strategies
+#   standings.pkl  -> fields of every Player, as plain dicts
+#   strategies.pkl -> the trained DecisionTreeClassifiers
+#   probs.npy      -> probs of the policy tables, one (3^9, 9) slice each
+#   best_mask.npy  -> best_mask of the policy tables, one row each
+_MANIFEST   = 'manifest.json'
+_STANDINGS  = 'standings.pkl'
+_STRATEGIES = 'strategies.pkl'
+_PROBS      = 'probs.npy'
+_BEST_MASK  = 'best_mask.npy'
+
+
+# sha256 of the contents of a file, read in chunks so big files are fine
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# write the standings, trees and policy tables built from the data with the
+# given digest. The old manifest is removed first, so the old cache stops
+# being valid before any of its files change. Files are written under
+# temporary names and moved in place, with the manifest last, so a half
+# written cache is never loaded
+def save_artifact(cache_dir, digest, standings, trees, tables):
+    os.makedirs(cache_dir, exist_ok=True)
+    ids = sorted(tables)
+    try:
+        os.remove(os.path.join(cache_dir, _MANIFEST))
+    except FileNotFoundError:
+        pass
+
+    def write(name, save):
+        tmp = os.path.join(cache_dir, name + '.tmp')
+        with open(tmp, 'wb') as f:
+            save(f)
+        os.replace(tmp, os.path.join(cache_dir, name))
+
+    write(_STANDINGS, lambda f: pickle.dump(standings, f))
+    write(_STRATEGIES, lambda f: pickle.dump(trees, f))
+    write(_PROBS, lambda f: np.save(f, np.stack([tables[i].probs
+                                                  for i in ids])))
+    write(_BEST_MASK, lambda f: np.save(f, np.stack([tables[i].best_mask
+                                                      for i in ids])))
+
+    manifest = {'version': ARTIFACT_VERSION, 'digest': digest,
+                'strategies': ids}
+    write(_MANIFEST, lambda f: f.write(json.dumps(manifest).encode()))
+
+
+# manifest of the cache if it was built by this version from the data with
+# the given digest, None otherwise
+def _valid_manifest(cache_dir, digest):
+    try:
+        with open(os.path.join(cache_dir, _MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != ARTIFACT_VERSION:
+        return None
+    if manifest.get('digest') != digest:
+        return None
+    return manifest
+
+
+# load the standings and policy tables from the cache. The tables are memory
+# mapped, so processes loading the same cache share their pages. Returns
+# None if there is no cache for the data with the given digest
+@instrument.phase('load_artifact')
+def load_artifact(cache_dir, digest):
+    manifest = _valid_manifest(cache_dir, digest)
+    if manifest is None:
+        return None
+
+    with open(os.path.join(cache_dir, _STANDINGS), 'rb') as f:
+        standings = pickle.load(f)
+    probs = np.load(os.path.join(cache_dir, _PROBS), mmap_mode='r')
+    best  = np.load(os.path.join(cache_dir, _BEST_MASK), mmap_mode='r')
+
+    tables = {i: PolicyTable(probs[k], best[k])
+              for k, i in enumerate(manifest['strategies'])}
+    return standings, tables
+
+
+# load the trained DecisionTreeClassifiers from the cache, None if there is no
+# cache for the data with the given digest
+def load_trees(cache_dir, digest):
+    if _valid_manifest(cache_dir, digest) is None:
+        return None
+    with open(os.path.join(cache_dir, _STRATEGIES), 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,112 @@
+import argparse
+import time
+
+import numpy as np
+
+from board import WINNING_COMBOS
+from policy import PolicyTable, tree_probs
+from simulation import print_results, round_robin_pairings
+from symmetry import encoded_index
+from tic_tac_toe import load_models
+
+
+# encoded values of the cells, see tic_tac_toe.label_codes
+EMPTY, O_CELL, X_CELL = 0, 1, 2
+
+_LINES = np.array(WINNING_COMBOS)
+
+
+# move probabilities of a strategy for a stack of (n, 9) encoded boards, with
+# a single predict_proba call for trees and a single lookup for PolicyTables
+def batch_probs(strat, boards):
+    if isinstance(strat, PolicyTable):
+        return np.asarray(strat.probs[encoded_index(boards)])
+    return tree_probs(strat, boards)
+
+
+# pick a move on every board in a stack of (n, 9) encoded boards at once, the
+# same way get_computer_move does: the valid position with the highest prob,
+# ties broken at random. valid is an (n, 9) bool mask of the playable spots
+# (by default the empty ones) and rng a numpy Generator
+def batch_moves(strat, boards, rng, valid=None):
+    if valid is None:
+        valid = boards == EMPTY
+    masked = np.where(valid, batch_probs(strat, boards), -np.inf)
+    best = masked == masked.max(axis=1, keepdims=True)
+    # a random key per best position, so argmax picks one of them uniformly
+    return np.argmax(np.where(best, rng.random(best.shape), -1.0), axis=1)
+
+
+# play one game for every entry of x_ids/o_ids (ids of the strategies that play
+# x and o) all at the same time. Every step makes one move in each unfinished
+# game, with one batch_moves call per strategy that is up. Returns the winner
+# of every game: 'x', 'o' or ' ' for a tie. If moves is given (an (n, 9) int
+# array filled with -1) the position of the k-th move of every game is
+# written to moves[:, k]
+def play_lockstep(strategies, x_ids, o_ids, rng, moves=None):
+    n = len(x_ids)
+    boards = np.zeros((n, 9), dtype=np.uint8)
+    winner = np.full(n, ' ')
+    active = np.arange(n)
+
+    for turn in range(9):
+        mover_ids = (x_ids if turn % 2 == 0 else o_ids)[active]
+        cell = X_CELL if turn % 2 == 0 else O_CELL
+
+        for strat_id in np.unique(mover_ids).tolist():
+            rows = active[mover_ids == strat_id]
+            picked = batch_moves(strategies[strat_id], boards[rows], rng)
+            boards[rows, picked] = cell
+            if moves is not None:
+                moves[rows, turn] = picked
+
+        # only the player that just moved can have won
+        won = (boards[active][:, _LINES] == cell).all(axis=2).any(axis=1)
+        winner[active[won]] = 'x' if cell == X_CELL else 'o'
+        active = active[~won]
+
+    return winner
+
+
+# play n games for each (x, o) pairing in lockstep. Returns tallies in the same
+# format as simulation.run_pairings
+def lockstep_pairings(strategies, pairings, n, seed=0):
+    x_ids = np.repeat([x for x, _ in pairings], n)
+    o_ids = np.repeat([o for _, o in pairings], n)
+    winner = play_lockstep(strategies, x_ids, o_ids,
+                           np.random.default_rng(seed))
+
+    results = {}
+    for k, pairing in enumerate(pairings):
+        w = winner[k * n:(k + 1) * n]
+        results[pairing] = {'x': int((w == 'x').sum()),
+                            'o': int((w == 'o').sum()),
+                            'tie': int((w == ' ').sum())}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play a round-robin between the player models with all "
+                    "games moving in lockstep and batched move picks")
+    parser.add_argument('-n', '--games', type=int, default=1000,
+                        help="number of games to play per pairing")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed for the games")
+    args = parser.parse_args()
+
+    players, strats = load_models("tictactoe-data.csv")
+    # every player from the data (not the perfect player)
+    pairings = round_robin_pairings(sorted(players))
+
+    start = time.perf_counter()
+    results = lockstep_pairings(strats, pairings, args.games, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print_results(results)
+    total = len(pairings) * args.games
+    print(f"\n{total} games in {elapsed:.2f}s ({total / elapsed:.0f} games/s)")
+
+
+if __name__ == '__main__':
+    main()
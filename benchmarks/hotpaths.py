@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# root of the repo, where the game modules and the data are
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from artifact import CACHE_DIR, file_digest, load_trees
+from batch import lockstep_pairings
+from board import Board
+from dataset import Dataset, load_dataset
+from simulation import play_game
+from tic_tac_toe import (Game, Player, board_to_str, get_computer_move,
+                         get_results, is_game_over, load_models,
+                         train_for_strats)
+
+DATA_FILE = os.path.join(ROOT, 'tictactoe-data.csv')
+
+
+# best time per call of fn over repeat rounds of number calls, in seconds
+def best_time(fn, number=1, repeat=7):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+# the bundled data repeated (with new game ids) until it has at least rows
+# moves, as a Dataset
+def synthetic_dataset(rows):
+    frame = pd.read_csv(DATA_FILE)
+    copies = -(-rows // len(frame))
+    num_games = frame['game_id'].max()
+
+    big = {col: np.tile(frame[col].to_numpy(), copies) for col in frame}
+    big['game_id'] = big['game_id'] + np.repeat(
+        np.arange(copies) * num_games, len(frame))
+    return Dataset(pd.DataFrame(big))
+
+
+# time of a fixed pure Python workload, in seconds per call. It is saved
+# with every result, so results from machines of different speeds can be
+# compared relative to it
+def reference_time():
+    return best_time(lambda: sum(i * i for i in range(10000)), 100, 15)
+
+
+# a board in the middle of a game, as the engine sees it on most moves
+def midgame_board():
+    b = Board()
+    for pos in (4, 0, 8, 2):
+        b.play(pos)
+    return b
+
+
+# micro benchmarks of the per-move hot paths, in seconds per call
+def engine_benchmarks(strats, trees):
+    b = midgame_board()
+    moves = b.legal_moves()
+    rng = random.Random(0)
+
+    game = Game(1, Player(1), Player(2))
+    for move_id, move in enumerate((4, 0, 8, 2, 1, 7, 6), start=1):
+        game.update_moves(move_id, move)
+
+    results = {
+        'is_game_over': best_time(lambda: is_game_over(b), 100000),
+        'board_to_str': best_time(lambda: board_to_str(b), 100000),
+        'get_computer_move.table':
+            best_time(lambda: get_computer_move(strats[2], b, moves, rng),
+                      100000),
+        'get_computer_move.tree':
+            best_time(lambda: get_computer_move(trees[2], b, moves, rng), 200),
+        'Game.find_winner': best_time(game.find_winner, 100000),
+        'simulation.play_game':
+            best_time(lambda: play_game(strats[2], strats[8], rng), 5000),
+        'batch.lockstep_game':
+            best_time(lambda: lockstep_pairings(strats, [(2, 8)], 100000),
+                      1, 3) / 100000,
+    }
+    return results
+
+
+# get_results and train_for_strats on a dataset, in seconds per call. The
+# benchmarks are named after rows, by default the number of moves in it
+def dataset_benchmarks(data, rows=None):
+    if rows is None:
+        rows = len(data.move)
+    players = get_results(data, out_file=None)
+    return {
+        f'get_results.{rows}':
+            best_time(lambda: get_results(data, out_file=None), 1, 3),
+        f'train_for_strats.{rows}':
+            best_time(lambda: train_for_strats(data, players, seed=0), 1, 3),
+    }
+
+
+# the dataset benchmarks on a synthetic dataset of the given size
+def data_benchmarks(rows):
+    return dataset_benchmarks(synthetic_dataset(rows), rows)
+
+
+# run every benchmark, on the synthetic datasets of the given sizes and on
+# the data files given (like the ones made by selfplay.py). Returns the
+# results in the format of the json files
+def run(sizes, data_files=()):
+    reference = reference_time()
+    strats = load_models(DATA_FILE)[1]
+    trees = load_trees(CACHE_DIR, file_digest(DATA_FILE))
+
+    results = engine_benchmarks(strats, trees)
+    for rows in sizes:
+        results.update(data_benchmarks(rows))
+    for path in data_files:
+        results.update(dataset_benchmarks(load_dataset(path)))
+
+    return {'meta': {'python': platform.python_version(),
+                     'machine': platform.machine(),
+                     'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                     # taken before and after, the best of the two
+                     'reference': min(reference, reference_time())},
+            'benchmarks': results}
+
+
+# compare new results to a baseline. When both have a reference time the
+# changes are relative to it, so a machine that is slower (or busier) overall
+# doesn't show up as a regression. Returns the names of the benchmarks that
+# got slower by more than threshold (0.3 -> 30%)
+def compare(baseline, new, threshold):
+    scale = 1.0
+    base_ref = baseline['meta'].get('reference')
+    new_ref = new['meta'].get('reference')
+    if base_ref and new_ref:
+        scale = base_ref / new_ref
+        print(f"reference {base_ref:.3g} -> {new_ref:.3g} s, changes are "
+              f"relative to it\n")
+    else:
+        print("no reference time in both files, changes are absolute\n")
+
+    regressions = []
+    print(f"{'benchmark':<32} {'baseline':>12} {'new':>12} {'change':>8}")
+    for name, base in sorted(baseline['benchmarks'].items()):
+        if name not in new['benchmarks']:
+            continue
+        value = new['benchmarks'][name]
+        change = value * scale / base - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<32} {base:>12.3g} {value:>12.3g} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the engine hot paths and compare the results "
+                    "against a baseline made on the same machine")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('--rows', default='1511,100000',
+                            help="comma separated sizes of the synthetic "
+                                 "datasets, in moves (up to 10000000)")
+    run_parser.add_argument('--data', action='append', default=[],
+                            help="also benchmark on this csv file, like the "
+                                 "ones from selfplay.py (can be repeated)")
+    run_parser.add_argument('--out', default=None,
+                            help="write the results to this json file")
+    run_parser.add_argument('--baseline', default=None,
+                            help="compare the results to this json file")
+    run_parser.add_argument('--threshold', type=float, default=0.3,
+                            help="slowdown that counts as a regression")
+
+    cmp_parser = sub.add_parser('compare', help="compare two result files")
+    cmp_parser.add_argument('baseline')
+    cmp_parser.add_argument('new')
+    cmp_parser.add_argument('--threshold', type=float, default=0.3,
+                            help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        new = run([int(r) for r in args.rows.split(',')], args.data)
+        if args.out is not None:
+            with open(args.out, 'w') as f:
+                json.dump(new, f, indent=2)
+        if args.baseline is None:
+            for name, value in sorted(new['benchmarks'].items()):
+                print(f"{name:<32} {value:>12.3g} s")
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+
+    regressions = compare(baseline, new, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import random
+import time
+
+
+# parse a reply of the game server into a dict of its key=value fields
+def parse_reply(line):
+    line = line.decode().strip()
+    if not line.startswith('OK'):
+        raise RuntimeError(f"server error: {line}")
+    return dict(field.split('=', 1) for field in line.split()[1:])
+
+
+# one client playing games against random opponents with random legal moves.
+# The latency of every request is appended to latencies[command], so the
+# move round-trips (where the computer answers) are kept apart from the rest
+async def client(host, port, games, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(line):
+        start = time.perf_counter()
+        writer.write(line.encode() + b'\n')
+        await writer.drain()
+        reply = await reader.readline()
+        latencies.setdefault(line.split()[0], []).append(
+            time.perf_counter() - start)
+        return parse_reply(reply)
+
+    opponents = (await request('players'))['players'].split(',')
+    for _ in range(games):
+        state = await request(f"new {rng.choice(opponents)} "
+                              f"{rng.choice('xo')}")
+        while state['result'] == 'none':
+            empty = [i for i, c in enumerate(state['board']) if c == '-']
+            state = await request(f"move {rng.choice(empty)}")
+
+    writer.write(b'quit\n')
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+# value at the given percentile of sorted values
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# print the p50, p99 and max of a list of latencies
+def print_latency(name, values):
+    values = sorted(values)
+    print(f"{name:>8} latency p50 {percentile(values, 50) * 1000:.2f} ms, "
+          f"p99 {percentile(values, 99) * 1000:.2f} ms, "
+          f"max {values[-1] * 1000:.2f} ms ({len(values)} requests)")
+
+
+async def run(host, port, clients, games, seed):
+    latencies = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, games, latencies,
+                                  random.Random(seed + i))
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{clients} clients x {games} games: {total} requests in "
+          f"{elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    print_latency('all', [t for values in latencies.values() for t in values])
+    for command in sorted(latencies):
+        print_latency(command, latencies[command])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the game server with many concurrent clients")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-c', '--clients', type=int, default=1000,
+                        help="number of concurrent sessions")
+    parser.add_argument('-g', '--games', type=int, default=5,
+                        help="games played by every client")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.host, args.port, args.clients, args.games,
+                    args.seed))
+
+
+if __name__ == '__main__':
+    main()
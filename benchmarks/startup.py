@@ -0,0 +1,71 @@
+import argparse
+import os
+import subprocess
+import sys
+
+
+# root of the repo, where the game modules and the data are
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that must not be imported on the fast start paths
+HEAVY_MODULES = ('pandas', 'sklearn')
+
+# what each startup path runs. The 2-player mode only needs the module, and
+# the 0/1-player modes load the models from the artifact cache
+PATHS = {
+    'import': "import tic_tac_toe",
+    'cached-models': "import tic_tac_toe\n"
+                     "tic_tac_toe.load_models('tictactoe-data.csv')",
+}
+
+
+# run code in a fresh interpreter with -X importtime. Returns the cumulative
+# import time of tic_tac_toe in ms and the heavy modules that got imported
+def measure(code):
+    check = (f"\nimport sys\n"
+             f"print(' '.join(m for m in {HEAVY_MODULES!r} "
+             f"if m in sys.modules))")
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                           code + check], cwd=ROOT, capture_output=True,
+                          text=True, check=True)
+
+    # lines look like "import time: self [us] | cumulative | name"
+    import_ms = None
+    for line in proc.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == 'tic_tac_toe':
+            import_ms = int(parts[1]) / 1000
+    return import_ms, proc.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the game starts within an import time budget "
+                    "and without pandas or sklearn")
+    parser.add_argument('--budget-ms', type=float, default=400,
+                        help="maximum cumulative import time of tic_tac_toe")
+    parser.add_argument('--runs', type=int, default=5,
+                        help="runs per path, the fastest one is kept")
+    args = parser.parse_args()
+
+    # make sure there is a cache to load, so the cached path is measured
+    subprocess.run([sys.executable, '-c', PATHS['cached-models']], cwd=ROOT,
+                   check=True)
+
+    failed = False
+    for name, code in PATHS.items():
+        results = [measure(code) for _ in range(args.runs)]
+        import_ms = min(ms for ms, _ in results)
+        heavy = sorted(set(m for _, mods in results for m in mods))
+
+        ok = import_ms <= args.budget_ms and not heavy
+        failed = failed or not ok
+        print(f"{name:>14}: {import_ms:8.1f} ms (budget {args.budget_ms:.0f})"
+              f"  heavy imports: {', '.join(heavy) or 'none'}"
+              f"  {'ok' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
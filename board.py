@@ -0,0 +1,128 @@
+# cells of every winning combo, and the same combos as bit masks of the cells
+WINNING_COMBOS = ((0, 1, 2), (3, 4, 5), (6, 7, 8),  # horizontal
+                  (0, 3, 6), (1, 4, 7), (2, 5, 8),  # vertical
+                  (0, 4, 8), (2, 4, 6))             # diagonal
+WIN_MASKS = tuple(sum(1 << c for c in combo) for combo in WINNING_COMBOS)
+
+# masks of the winning combos that go through every cell. After a move only
+# these can have been completed
+LINES_THROUGH = tuple(tuple(w for w in WIN_MASKS if w >> c & 1)
+                      for c in range(9))
+
+# mask of a board with every spot taken
+FULL_MASK = (1 << 9) - 1
+
+# lookup tables over all 512 masks of 9 cells:
+#   _HAS_WIN[m]    -> the cells in m contain a winning combo
+#   EMPTY_CELLS[m] -> the cells not in m, which are the legal moves
+#   TERN[m]        -> sum of 3^c over the cells in m, used for Board.index
+# and per cell c:
+#   WIN_AT[c][m]   -> one of the combos through c is complete in m
+_HAS_WIN    = [any(m & w == w for w in WIN_MASKS)
+               for m in range(FULL_MASK + 1)]
+EMPTY_CELLS = [tuple(c for c in range(9) if not m >> c & 1)
+               for m in range(FULL_MASK + 1)]
+TERN        = [sum(3 ** c for c in range(9) if m >> c & 1)
+               for m in range(FULL_MASK + 1)]
+WIN_AT      = [[any(m & w == w for w in LINES_THROUGH[c])
+                for m in range(FULL_MASK + 1)] for c in range(9)]
+
+
+class Board:
+    '''
+    Compact representation of a tic tac toe board. The spots taken by X and by
+    O are each kept as a 9-bit mask, where bit c is board position c. Moves are
+    made and unmade in constant time, and the legal moves are a table lookup
+    on the masks. The winner is kept up to date as moves are made, by checking
+    only the combos through the cell that was just played. Indexing a Board
+    gives 'X', 'O' or ' ' for a position so it can be printed with print_board.
+    This is the rules core shared by live games and the replays in Game.
+    '''
+    __slots__ = ('x', 'o', 'turn', 'won')
+
+    def __init__(self, x=0, o=0):
+        self.x = x
+        self.o = o
+        # X always goes first, so O is up when both have made as many moves
+        self.turn = 'x' if bin(x).count('1') == bin(o).count('1') else 'o'
+        self.won = 'x' if _HAS_WIN[x] else 'o' if _HAS_WIN[o] else ' '
+
+    # make a board from the str representation made by board_to_str
+    @classmethod
+    def from_str(cls, str_board):
+        x = sum(1 << c for c, v in enumerate(str_board) if v == 'x')
+        o = sum(1 << c for c, v in enumerate(str_board) if v == 'o')
+        return cls(x, o)
+
+    # make the board with the given index, the reverse of Board.index
+    @classmethod
+    def from_index(cls, i):
+        x = o = 0
+        for c in range(9):
+            i, digit = divmod(i, 3)
+            if digit == 2:
+                x |= 1 << c
+            elif digit == 1:
+                o |= 1 << c
+        return cls(x, o)
+
+    def __getitem__(self, pos):
+        bit = 1 << pos
+        if self.x & bit:
+            return 'X'
+        if self.o & bit:
+            return 'O'
+        return ' '
+
+    def copy(self):
+        b = Board.__new__(Board)
+        b.x, b.o, b.turn, b.won = self.x, self.o, self.turn, self.won
+        return b
+
+    # place the mark of the player whose turn it is at pos
+    def play(self, pos):
+        if self.turn == 'x':
+            self.x |= 1 << pos
+            if WIN_AT[pos][self.x]:
+                self.won = 'x'
+            self.turn = 'o'
+        else:
+            self.o |= 1 << pos
+            if WIN_AT[pos][self.o]:
+                self.won = 'o'
+            self.turn = 'x'
+
+    # place the mark of side ('x' or 'o') at pos, no matter whose turn it is.
+    # Used for replays, where the side comes with the move
+    def put(self, pos, side):
+        self.turn = side
+        self.play(pos)
+
+    # take back the last move, which was made at pos. No move can be made
+    # after a win, so the board had no winner before it
+    def undo(self, pos):
+        bit = ~(1 << pos)
+        self.x &= bit
+        self.o &= bit
+        self.turn = 'o' if self.turn == 'x' else 'x'
+        self.won = ' '
+
+    # tuple of the empty positions
+    def legal_moves(self):
+        return EMPTY_CELLS[self.x | self.o]
+
+    def is_full(self):
+        return self.x | self.o == FULL_MASK
+
+    # 'x' or 'o' if that player has a winning combo, ' ' otherwise
+    def winner(self):
+        return self.won
+
+    # index of the board as a base-3 number, as used by policy.PolicyTable
+    def index(self):
+        return 2 * TERN[self.x] + TERN[self.o]
+
+    # same str representation as board_to_str
+    def to_str(self):
+        return ''.join('x' if self.x >> c & 1 else 'o' if self.o >> c & 1
+                       else '-' for c in range(9))
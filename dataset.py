@@ -0,0 +1,81 @@
+import numpy as np
+
+import instrument
+
+
+# columns of tictactoe-data.csv and the dtypes they are read with. Moves are
+# uint16 so the boards of mnk.py with more than 256 cells fit
+COLUMNS = {'game_id': np.int64, 'player_x_id': np.int64,
+           'player_o_id': np.int64, 'move_id': np.int64,
+           'pre_state': str, 'move': np.uint16, 'post_state': str}
+
+# byte value of a cell -> encoded value. The codes are the label_codes of
+# '-', 'o' and 'x', so the decoded states can be fed straight to the
+# DecisionTreeClassifier
+_DECODE = np.zeros(256, dtype=np.uint8)
+_DECODE[ord('-')], _DECODE[ord('o')], _DECODE[ord('x')] = 0, 1, 2
+
+
+# decode a column of board states into an (n, cells) uint8 array. States are
+# 9 characters for tic tac toe, and m*n for the bigger games of mnk.py
+def decode_states(states):
+    raw = np.frombuffer(''.join(states).encode('ascii'), dtype=np.uint8)
+    cells = len(raw) // len(states) if len(states) else 9
+    return _DECODE[raw].reshape(-1, cells)
+
+
+class Dataset:
+    '''
+    The tic tac toe data loaded in a single pass. Moves are sorted by game and
+    then by move_id, and the moves of game g are the rows from starts[g] up
+    to starts[g+1]. Per game there is the game_id and the ids of the X and O
+    players, per move there is the move_id, the position played, the id of
+    the player who made it and the encoded board before and after the move.
+    '''
+
+    def __init__(self, frame):
+        frame = frame.sort_values(['game_id', 'move_id'], kind='stable')
+
+        game_col     = frame['game_id'].to_numpy()
+        self.move_id = frame['move_id'].to_numpy()
+        self.move    = frame['move'].to_numpy(dtype=COLUMNS['move'])
+        self.pre     = decode_states(frame['pre_state'])
+        self.post    = decode_states(frame['post_state'])
+
+        # first row of every game, plus the end of the last one
+        first = np.flatnonzero(np.r_[True, game_col[1:] != game_col[:-1]])
+        self.starts   = np.r_[first, len(game_col)]
+        self.game_id  = game_col[first]
+        self.player_x = frame['player_x_id'].to_numpy()[first]
+        self.player_o = frame['player_o_id'].to_numpy()[first]
+
+        # X makes the odd moves and O the even ones
+        is_x = self.move_id % 2 == 1
+        self.mover = np.where(is_x, frame['player_x_id'].to_numpy(),
+                              frame['player_o_id'].to_numpy())
+
+    def __len__(self):
+        return len(self.game_id)
+
+    # ids of all the players in the data
+    def player_ids(self):
+        return np.union1d(self.player_x, self.player_o).tolist()
+
+    # (game_id, x id, o id, move_ids, moves) of every game, in game_id order
+    def games(self):
+        starts = self.starts.tolist()
+        move_ids = self.move_id.tolist()
+        moves = self.move.tolist()
+        for g, (gid, x, o) in enumerate(zip(self.game_id.tolist(),
+                                            self.player_x.tolist(),
+                                            self.player_o.tolist())):
+            lo, hi = starts[g], starts[g+1]
+            yield gid, x, o, move_ids[lo:hi], moves[lo:hi]
+
+
+# read the csv file with the game data into a Dataset. pandas is imported here
+# so the modules that only need a Dataset type start without it
+@instrument.phase('load_dataset')
+def load_dataset(path):
+    import pandas as pd
+    return Dataset(pd.read_csv(path, dtype=COLUMNS))
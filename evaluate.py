@@ -0,0 +1,193 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from artifact import CACHE_DIR, file_digest
+from batch import EMPTY, batch_probs
+from dataset import load_dataset
+from training import fit_strategy
+
+
+# probs below this count as this for the log-loss, so a move the tree never
+# saw doesn't make it infinite
+_MIN_PROB = 1e-15
+
+
+class Folds:
+    '''
+    The moves of every player split into k folds by game: all the moves of a
+    game land in the same fold, so no position of a test game was seen in
+    training. For every move there is the encoded board before it, the move,
+    the id of the player who made it and its fold.
+    '''
+
+    def __init__(self, boards, moves, player, fold, k):
+        self.boards = boards
+        self.moves  = moves
+        self.player = player
+        self.fold   = fold
+        self.k      = k
+
+    # (train boards, train moves, test boards, test moves) of a player for
+    # the given fold
+    def split(self, player_id, fold):
+        mine = self.player == player_id
+        test = mine & (self.fold == fold)
+        train = mine & (self.fold != fold)
+        return (self.boards[train], self.moves[train],
+                self.boards[test], self.moves[test])
+
+    def player_ids(self):
+        return np.unique(self.player).tolist()
+
+    def save(self, path):
+        np.savez(path, boards=self.boards, moves=self.moves,
+                 player=self.player, fold=self.fold, k=self.k)
+
+
+# split the moves of every player in a Dataset into k folds by game. The games
+# of each player are shuffled with the seed and dealt out in turn
+def make_folds(data, k, seed=0):
+    lengths = np.diff(data.starts)
+    game_of_move = np.repeat(np.arange(len(data)), lengths)
+    fold = np.zeros(len(data.move), dtype=np.int8)
+
+    rng = np.random.default_rng(seed)
+    for player in data.player_ids():
+        mine = data.mover == player
+        games = np.unique(game_of_move[mine])
+        game_fold = np.empty(len(games), dtype=np.int8)
+        game_fold[rng.permutation(len(games))] = np.arange(len(games)) % k
+        fold[mine] = game_fold[np.searchsorted(games, game_of_move[mine])]
+
+    return Folds(data.pre, data.move, data.mover, fold, k)
+
+
+# the folds of a data file, from the cache if they were made before with the
+# same data, k and seed, so repeated runs skip reading and encoding the csv
+def load_folds(data_file, k, seed=0, cache_dir=CACHE_DIR):
+    path = os.path.join(cache_dir,
+                        f"folds-{file_digest(data_file)[:16]}-{k}-{seed}.npz")
+    if os.path.exists(path):
+        with np.load(path) as f:
+            return Folds(f['boards'], f['moves'], f['player'], f['fold'],
+                         int(f['k']))
+
+    folds = make_folds(load_dataset(data_file), k, seed)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = path + '.tmp.npz'
+    folds.save(tmp)
+    os.replace(tmp, path)
+    return folds
+
+
+# number of correct predictions and the summed log-loss of a tree on test
+# moves. The prediction is what get_computer_move would play: the empty
+# spot with the highest prob, with a tie counting as 1/(number of tied
+# spots). The log-loss uses the probs of the empty spots, normalized
+def score_moves(strat, boards, moves):
+    probs = np.where(boards == EMPTY, batch_probs(strat, boards), 0.0)
+    best = probs == probs.max(axis=1, keepdims=True)
+    rows = np.arange(len(moves))
+    correct = (best[rows, moves] / best.sum(axis=1)).sum()
+
+    total = probs.sum(axis=1)
+    p = np.where(total > 0, probs[rows, moves] / np.where(total > 0, total, 1),
+                 1 / (boards == EMPTY).sum(axis=1))
+    return float(correct), float(-np.log(np.maximum(p, _MIN_PROB)).sum())
+
+
+# fit and score one (player, max_depth, fold). Returns the counts the report
+# adds up: (player, max_depth, test moves, correct, summed log-loss)
+def run_task(task):
+    player, max_depth, fold, split, seed, canonical = task
+    train_b, train_m, test_b, test_m = split
+    if len(test_m) == 0 or len(train_m) == 0:
+        return player, max_depth, 0, 0.0, 0.0
+    dt = fit_strategy(train_b, train_m, seed, canonical, max_depth)
+    correct, loss = score_moves(dt, test_b, test_m)
+    return player, max_depth, len(test_m), correct, loss
+
+
+# k-fold cross-validation of the tree of every player for every max_depth
+# (None is no limit), in a pool of worker processes. Returns a dict of
+# (player, max_depth) -> {'moves', 'accuracy', 'log_loss'}
+def cross_validate(folds, depths=(None,), seed=0, canonical=False, workers=1):
+    tasks = [(player, depth, f, folds.split(player, f), seed, canonical)
+             for player in folds.player_ids()
+             for depth in depths
+             for f in range(folds.k)]
+
+    if workers == 1:
+        results = [run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_task, tasks, chunksize=4))
+
+    totals = {}
+    for player, depth, n, correct, loss in results:
+        t = totals.setdefault((player, depth), [0, 0.0, 0.0])
+        t[0] += n
+        t[1] += correct
+        t[2] += loss
+
+    return {key: {'moves': n, 'accuracy': correct / n if n else 0.0,
+                  'log_loss': loss / n if n else 0.0}
+            for key, (n, correct, loss) in totals.items()}
+
+
+# print the scores of every player and max_depth, and the best max_depth of
+# every player by log-loss
+def print_report(scores, depths):
+    def name(depth):
+        return 'none' if depth is None else str(depth)
+
+    print(f"{'player':>6} {'depth':>6} {'moves':>6} {'accuracy':>9} "
+          f"{'log-loss':>9}")
+    for player in sorted({p for p, _ in scores}):
+        best = min(depths, key=lambda d: scores[player, d]['log_loss'])
+        for depth in depths:
+            s = scores[player, depth]
+            mark = ' *' if depth == best and len(depths) > 1 else ''
+            print(f"{player:>6} {name(depth):>6} {s['moves']:>6} "
+                  f"{s['accuracy']:>9.3f} {s['log_loss']:>9.3f}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-validate how well the player models predict the "
+                    "moves of their players")
+    parser.add_argument('--data', default="tictactoe-data.csv",
+                        help="csv file with the games")
+    parser.add_argument('-k', '--folds', type=int, default=5,
+                        help="number of folds, split by game")
+    parser.add_argument('--depths', default='none',
+                        help="comma separated max_depth values to try, none "
+                             "for no limit (like none,2,4,6)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument('--canonical', action='store_true',
+                        help="train on canonical (symmetry reduced) boards")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed of the folds and of the trees")
+    args = parser.parse_args()
+
+    depths = [None if d.strip().lower() == 'none' else int(d)
+              for d in args.depths.split(',')]
+
+    start = time.perf_counter()
+    folds = load_folds(args.data, args.folds, args.seed)
+    scores = cross_validate(folds, depths, args.seed, args.canonical,
+                            args.workers)
+    elapsed = time.perf_counter() - start
+
+    print_report(scores, depths)
+    print(f"\n{len(scores) * args.folds} fits in {elapsed:.2f}s "
+          f"on {args.workers} workers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import os
+
+import numpy as np
+
+from board import Board
+from dataset import load_dataset
+from policy import NUM_BOARDS
+from symmetry import CANONICAL, canonical_counts, encoded_index
+from tic_tac_toe import is_game_over
+
+
+# where the position database is written by default
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'positions.npz')
+
+# codes of the status column
+ONGOING, X_WON, O_WON, TIE = 0, 1, 2, 3
+
+_STATUS = {'x': X_WON, 'o': O_WON, ' ': TIE}
+
+
+class PositionDB:
+    '''
+    Every position reachable from the empty board, one row each, sorted by
+    Board.index. For every position there is the side to move (0 for x, 1
+    for o), its status by the is_game_over rules, the number of move
+    sequences from the empty board that reach it (paths), and how many
+    complete games played on from it end in an x win, an o win or a tie.
+    '''
+
+    def __init__(self, index, to_move, status, paths, x_wins, o_wins, ties):
+        self.index   = index
+        self.to_move = to_move
+        self.status  = status
+        self.paths   = paths
+        self.x_wins  = x_wins
+        self.o_wins  = o_wins
+        self.ties    = ties
+
+        # row of every Board.index, -1 for the unreachable ones
+        self.row_of = np.full(NUM_BOARDS, -1, dtype=np.int32)
+        self.row_of[index] = np.arange(len(index), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.index)
+
+    # the row of a Board, or -1 if it can't be reached in a game
+    def row(self, b):
+        return int(self.row_of[b.index()])
+
+    # everything stored for a Board as a dict, None if it is unreachable
+    def lookup(self, b):
+        r = self.row(b)
+        if r < 0:
+            return None
+        return {'to_move': 'xo'[self.to_move[r]],
+                'status': ('ongoing', 'x', 'o', 'tie')[self.status[r]],
+                'paths': int(self.paths[r]), 'x_wins': int(self.x_wins[r]),
+                'o_wins': int(self.o_wins[r]), 'ties': int(self.ties[r])}
+
+    # number of pieces on the board of every position
+    def depth(self):
+        digits = (self.index[:, None] // 3 ** np.arange(9)) % 3
+        return (digits != 0).sum(axis=1)
+
+    def save(self, path):
+        np.savez(path, index=self.index, to_move=self.to_move,
+                 status=self.status, paths=self.paths, x_wins=self.x_wins,
+                 o_wins=self.o_wins, ties=self.ties)
+
+
+# walk every game from the empty board once, with the outcome counts of each
+# position memoized so a position is only expanded the first time it is seen
+def enumerate_positions():
+    outcomes = {}   # index -> (x wins, o wins, ties) of the games from it
+    info = {}       # index -> (to move, status)
+
+    def walk(b):
+        i = b.index()
+        if i in outcomes:
+            return outcomes[i]
+
+        over, winner = is_game_over(b)
+        info[i] = (0 if b.turn == 'x' else 1,
+                   _STATUS[winner] if over else ONGOING)
+        if over:
+            counts = (int(winner == 'x'), int(winner == 'o'),
+                      int(winner == ' '))
+        else:
+            counts = (0, 0, 0)
+            for pos in b.legal_moves():
+                b.play(pos)
+                x, o, t = walk(b)
+                b.undo(pos)
+                counts = (counts[0] + x, counts[1] + o, counts[2] + t)
+
+        outcomes[i] = counts
+        return counts
+
+    walk(Board())
+
+    # paths to every position, adding them up one ply at a time
+    paths = {Board().index(): 1}
+    frontier = [Board()]
+    while frontier:
+        next_frontier = {}
+        for b in frontier:
+            if info[b.index()][1] != ONGOING:
+                continue
+            for pos in b.legal_moves():
+                child = b.copy()
+                child.play(pos)
+                c = child.index()
+                paths[c] = paths.get(c, 0) + paths[b.index()]
+                next_frontier[c] = child
+        frontier = list(next_frontier.values())
+
+    index = np.array(sorted(outcomes), dtype=np.int32)
+    rows = [(info[i], outcomes[i], paths[i]) for i in index.tolist()]
+    return PositionDB(
+        index,
+        np.array([r[0][0] for r in rows], dtype=np.uint8),
+        np.array([r[0][1] for r in rows], dtype=np.uint8),
+        np.array([r[2] for r in rows], dtype=np.uint32),
+        np.array([r[1][0] for r in rows], dtype=np.uint32),
+        np.array([r[1][1] for r in rows], dtype=np.uint32),
+        np.array([r[1][2] for r in rows], dtype=np.uint32))
+
+
+# load the position database, building and saving it if there is none
+def load_positions(path=DB_FILE):
+    if path is not None and os.path.exists(path):
+        with np.load(path) as f:
+            return PositionDB(f['index'], f['to_move'], f['status'],
+                              f['paths'], f['x_wins'], f['o_wins'], f['ties'])
+    db = enumerate_positions()
+    if path is not None:
+        db.save(path)
+    return db
+
+
+# how many of the reachable positions show up as a board before a move in
+# the data, per number of pieces on the board, both counting every position
+# and counting the 8 symmetric versions of a position as one. Returns a list
+# of (pieces, seen, nonterminal positions, seen up to symmetry, nonterminal
+# positions up to symmetry), and the number of boards in the data that
+# can't be reached from the empty board (row -1)
+def coverage(db, data):
+    rows = db.row_of[encoded_index(data.pre)]
+    known = rows >= 0
+    seen = np.zeros(len(db), dtype=bool)
+    seen[rows[known]] = True
+
+    # positions up to symmetry are counted by their canonical board, which is
+    # reachable whenever the board is
+    canonical_seen = np.zeros(len(db), dtype=bool)
+    canonical_seen[db.row_of[canonical_counts(data.pre[known])[0]]] = True
+    is_canonical = CANONICAL[db.index] == db.index
+
+    depth = db.depth()
+    playable = db.status == ONGOING
+    return [(d, int((seen & (depth == d)).sum()),
+             int((playable & (depth == d)).sum()),
+             int((canonical_seen & (depth == d)).sum()),
+             int((playable & is_canonical & (depth == d)).sum()))
+            for d in range(9)], int((~known).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the database of every reachable position and "
+                    "report how much of it the data covers")
+    parser.add_argument('--db', default=DB_FILE,
+                        help="file the database is kept in")
+    parser.add_argument('--data', default="tictactoe-data.csv",
+                        help="csv file to report the coverage of")
+    args = parser.parse_args()
+
+    db = load_positions(args.db)
+    root = db.lookup(Board())
+    games = root['x_wins'] + root['o_wins'] + root['ties']
+    print(f"{len(db)} positions, {games} games "
+          f"(x wins {root['x_wins']}, o wins {root['o_wins']}, "
+          f"ties {root['ties']})")
+
+    print(f"\n{'':>6} {'':>27} {'up to symmetry':>27}")
+    print(f"{'pieces':>6} {'seen':>6} {'positions':>10} {'coverage':>9} "
+          f"{'seen':>6} {'positions':>10} {'coverage':>9}")
+    by_depth, unknown = coverage(db, load_dataset(args.data))
+    for d, seen, total, sym_seen, sym_total in by_depth:
+        print(f"{d:>6} {seen:>6} {total:>10} {seen / total:>9.1%} "
+              f"{sym_seen:>6} {sym_total:>10} {sym_seen / sym_total:>9.1%}")
+    if unknown:
+        print(f"\n{unknown} boards in the data aren't reachable positions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import os
+import pickle
+import sys
+
+from board import Board
+from tic_tac_toe import Game, Player
+
+
+# default location of the checkpoint of the ingested data
+CHECKPOINT_FILE = 'ingest-checkpoint.pkl'
+
+
+class IngestState:
+    '''
+    Everything the incremental ingest keeps between runs: how far into the
+    csv file it got (byte offset), the moves of the games that haven't
+    finished yet by game_id, and the Players with their standings and move
+    histories. Apart from the Players, the state never grows with the length
+    of the log.
+    '''
+
+    def __init__(self):
+        self.offset  = 0
+        self.pending = {}      # game_id -> (x id, o id, [(move_id, move)], Board)
+        self.players = {}
+        self.games   = 0
+
+    # Player with the given id, created the first time they show up
+    def player(self, player_id):
+        if player_id not in self.players:
+            self.players[player_id] = Player(player_id)
+        return self.players[player_id]
+
+
+# turn a line of the csv into (game_id, player_x_id, player_o_id, move_id,
+# pre_state, move, post_state)
+def parse_row(line):
+    gid, x, o, move_id, pre, move, post = line.strip().split(',')
+    return int(gid), int(x), int(o), int(move_id), pre, int(move), post
+
+
+# rows of the csv file from byte offset on, as (row, offset after the row).
+# The header is skipped, and a last line without a newline is left for the
+# next run since it may still be being written
+def read_rows(path, offset=0):
+    with open(path, 'rb') as f:
+        if offset == 0:
+            offset += len(f.readline())
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            if line.strip():
+                yield parse_row(line.decode('ascii')), offset
+
+
+# feed rows into the state. Rows come as (row, offset) pairs like read_rows
+# gives, and the offset is saved once the row has been applied. The rows of
+# different games can be interleaved. The side of every move comes from its
+# move_id, odd for x and even for o. Every game is ended as soon as its moves
+# finish it, updating the Players in place. Rows that can't be applied (a
+# move on a taken spot) are skipped with a warning. Returns the number of
+# games finished
+def ingest_rows(state, rows):
+    finished = 0
+    for (gid, x, o, move_id, _, move, _), offset in rows:
+        state.offset = offset
+        if gid not in state.pending:
+            state.pending[gid] = (x, o, [], Board())
+        _, _, moves, b = state.pending[gid]
+
+        if b[move] != ' ':
+            print(f"warning: skipping move {move_id} of game {gid}, spot "
+                  f"{move} is already taken", file=sys.stderr)
+            continue
+        moves.append((move_id, move))
+        b.put(move, 'x' if move_id % 2 == 1 else 'o')
+
+        # game is over because of a winning combo or a full board
+        if b.winner() != ' ' or b.is_full():
+            game = Game(gid, state.player(x), state.player(o))
+            for m_id, m in sorted(moves):
+                game.update_moves(m_id, m)
+            game.game_over()
+            del state.pending[gid]
+            state.games += 1
+            finished += 1
+    return finished
+
+
+# load the state from a checkpoint file, or a new state if there is none
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return IngestState()
+    with open(path, 'rb') as f:
+        saved = pickle.load(f)
+
+    state = IngestState()
+    state.offset  = saved['offset']
+    state.pending = saved['pending']
+    state.games   = saved['games']
+    state.players = {i: Player.from_dict(d) for i, d in saved['players'].items()}
+    return state
+
+
+# write the state to a checkpoint file. It is written to a temporary file
+# first, so a crash never leaves a half written checkpoint
+def save_checkpoint(state, path):
+    saved = {'offset': state.offset, 'pending': state.pending,
+             'games': state.games,
+             'players': {i: p.to_dict() for i, p in state.players.items()}}
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(saved, f)
+    os.replace(path + '.tmp', path)
+
+
+# rows read from a stream of csv lines, like stdin. There is no offset to
+# keep for a stream, so it is always 0
+def stream_rows(lines):
+    for line in lines:
+        if line.strip() and not line.startswith('game_id'):
+            yield parse_row(line), 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update the standings with the games added to the data "
+                    "since the last run")
+    parser.add_argument('--data', default="tictactoe-data.csv",
+                        help="csv file with the games")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE,
+                        help="file the progress is kept in between runs")
+    parser.add_argument('--stdin', action='store_true',
+                        help="read move records from stdin instead of --data")
+    parser.add_argument('--results', default=None,
+                        help="write the standings to this file, like "
+                             "results.txt")
+    args = parser.parse_args()
+
+    state = load_checkpoint(args.checkpoint)
+    if args.stdin:
+        offset = state.offset
+        finished = ingest_rows(state, stream_rows(sys.stdin))
+        state.offset = offset
+    else:
+        if os.path.getsize(args.data) < state.offset:
+            sys.exit(f"{args.data} is shorter than the checkpoint, it was "
+                     f"rewritten. Remove {args.checkpoint} to start over")
+        finished = ingest_rows(state, read_rows(args.data, state.offset))
+    save_checkpoint(state, args.checkpoint)
+
+    print(f"{finished} new games, {state.games} in total")
+    if state.pending:
+        print(f"{len(state.pending)} games not finished yet")
+    if args.results is not None:
+        with open(args.results, 'w') as f:
+            for i in sorted(state.players):
+                state.players[i].player_write(f)
+                f.write('\n\n')
+
+
+if __name__ == '__main__':
+    main()
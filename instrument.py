@@ -0,0 +1,166 @@
+import atexit
+import functools
+import json
+import math
+import time
+
+# Opt-in instrumentation. Nothing is measured until enable() is called, and
+# until then every hook is a check of this flag, so the hot paths pay next to
+# nothing for it
+enabled = False
+
+_counters   = {}
+_histograms = {}
+
+
+class Histogram:
+    '''
+    Timings of one phase. Besides the count, total, min and max, every value
+    goes into a power of 2 bucket of nanoseconds, which is enough to get the
+    percentiles within a factor of 2 at a fixed memory cost.
+    '''
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count   = 0
+        self.total   = 0.0
+        self.min     = math.inf
+        self.max     = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = math.frexp(seconds * 1e9)[1]
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    # upper bound of the bucket the given percentile falls in, in seconds
+    def percentile(self, pct):
+        rank = self.count * pct / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2.0 ** bucket / 1e9, self.max)
+        return self.max
+
+    def summary(self):
+        return {'count': self.count, 'total': self.total,
+                'mean': self.total / self.count if self.count else 0.0,
+                'min': self.min if self.count else 0.0, 'max': self.max,
+                'p50': self.percentile(50), 'p99': self.percentile(99),
+                'buckets_ns': {str(2 ** b): n
+                               for b, n in sorted(self.buckets.items())}}
+
+
+# turn instrumentation on
+def enable():
+    global enabled
+    enabled = True
+
+
+# add n to a counter
+def count(name, n=1):
+    if enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+# add a timing in seconds to a histogram
+def observe(name, seconds):
+    if enabled:
+        if name not in _histograms:
+            _histograms[name] = Histogram()
+        _histograms[name].add(seconds)
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+# context manager that times its block into the histogram name
+def timed(name):
+    return _Timer(name) if enabled else _NO_TIMER
+
+
+# decorator that times every call of a function into the histogram name
+def phase(name):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# everything measured so far, as a dict ready to be written as json
+def snapshot():
+    return {'counters': dict(sorted(_counters.items())),
+            'histograms': {name: h.summary()
+                           for name, h in sorted(_histograms.items())}}
+
+
+# write everything measured so far to a json file
+def dump(path):
+    with open(path, 'w') as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+# run the whole program under cProfile and write the stats to path on exit.
+# They can be read with pstats or tools like snakeviz
+def start_profile(path):
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def stop():
+        profiler.disable()
+        profiler.dump_stats(path)
+    atexit.register(stop)
+
+
+# add the instrumentation flags to a command line parser
+def add_arguments(parser):
+    parser.add_argument('--metrics', default=None, metavar='FILE',
+                        help="collect per-phase timings and counters and "
+                             "write them to FILE as json on exit")
+    parser.add_argument('--profile', default=None, metavar='FILE',
+                        help="run under cProfile and write the stats to FILE")
+
+
+# turn on what the flags from add_arguments asked for
+def setup(args):
+    if args.metrics is not None:
+        enable()
+        atexit.register(dump, args.metrics)
+    if args.profile is not None:
+        start_profile(args.profile)
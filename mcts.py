@@ -0,0 +1,217 @@
+import itertools
+import math
+import random
+import time
+
+from board import FULL_MASK, EMPTY_CELLS, TERN, WIN_AT
+from policy import NUM_BOARDS, PolicyTable, compile_policy
+
+
+# id of the MCTS player in the strategies dict. The players in the data start
+# at 1 and the perfect player is 0, so -1 is free
+MCTS_ID = -1
+
+# iterations per move when no budget is given
+DEFAULT_ITERATIONS = 2000
+
+# outcome of a playout
+_TIE, _X_WIN, _O_WIN = 0, 1, 2
+
+# reward of every outcome for the player who made the last move, X then O
+_REWARD = ((0.5, 1.0, 0.0), (0.5, 0.0, 1.0))
+
+# 3^c, what a piece at c adds to Board.index (twice that for an x)
+_POW3 = tuple(3 ** c for c in range(9))
+
+
+class MCTS:
+    '''
+    Monte Carlo Tree Search computer player. The stats of the search are kept
+    in two flat lists with a slot for every Board.index (visits, and the total
+    reward of the player who moved into the board), so there are no node
+    objects and boards that come up through different move orders share their
+    stats. A search runs for a number of iterations, a time limit in seconds,
+    or until either runs out. The stats are kept between the moves of a game,
+    so every search starts from what the earlier ones found out, and they are
+    cleared when a new game starts.
+
+    Playouts pick random moves, or with a guide (a PolicyTable or a tree from
+    train_for_strats) moves drawn from the guide's probabilities, which makes
+    it play like that player but stronger.
+    '''
+
+    def __init__(self, iterations=None, time_limit=None, guide=None,
+                 exploration=1.4):
+        if iterations is None and time_limit is None:
+            iterations = DEFAULT_ITERATIONS
+        self.iterations  = iterations
+        self.time_limit  = time_limit
+        self.exploration = exploration
+        if guide is not None and not isinstance(guide, PolicyTable):
+            guide = compile_policy(guide)
+        self.guide = guide
+        # index -> (moves, cumulative weights) for the guided playouts
+        self.weights = {}
+        self.reset()
+
+    # forget everything the searches found out
+    def reset(self):
+        self.visits = [0] * NUM_BOARDS
+        self.reward = [0.0] * NUM_BOARDS
+        self.root_x = 0
+        self.root_o = 0
+
+    # moves and cumulative weights the guide plays with on board i
+    def guide_weights(self, i, empty):
+        moves = EMPTY_CELLS[FULL_MASK ^ empty]
+        probs = self.guide.probs[i]
+        weights = [float(probs[p]) for p in moves]
+        # the guide gives no weight to any empty spot, play at random
+        if sum(weights) <= 0:
+            weights = [1.0] * len(moves)
+        entry = (moves, list(itertools.accumulate(weights)))
+        self.weights[i] = entry
+        return entry
+
+    # play the game on to the end from the given masks. Returns the outcome
+    def playout(self, x, o, x_to_move, rng):
+        guided = self.guide is not None
+        while True:
+            taken = x | o
+            if taken == FULL_MASK:
+                return _TIE
+            if guided:
+                i = 2 * TERN[x] + TERN[o]
+                moves, cum = (self.weights.get(i)
+                              or self.guide_weights(i, FULL_MASK ^ taken))
+                pos = rng.choices(moves, cum_weights=cum)[0]
+            else:
+                moves = EMPTY_CELLS[taken]
+                pos = moves[int(rng.random() * len(moves))]
+
+            if x_to_move:
+                x |= 1 << pos
+                if WIN_AT[pos][x]:
+                    return _X_WIN
+            else:
+                o |= 1 << pos
+                if WIN_AT[pos][o]:
+                    return _O_WIN
+            x_to_move = not x_to_move
+
+    # one iteration: walk down from the board by UCT until a board that has
+    # not been visited (or the end of the game), play out from there and add
+    # the outcome to the stats of every board on the way
+    def iterate(self, x, o, x_to_move, rng):
+        visits, reward = self.visits, self.reward
+        c = self.exploration
+        i = 2 * TERN[x] + TERN[o]
+        path = [i]
+        movers = [0]
+
+        while True:
+            moves = EMPTY_CELLS[x | o]
+            if not moves:
+                outcome = _TIE
+                break
+            step = 2 if x_to_move else 1
+
+            # boards that were never visited go first, in a random order
+            unvisited = [p for p in moves if not visits[i + step * _POW3[p]]]
+            if unvisited:
+                pos = unvisited[int(rng.random() * len(unvisited))]
+            else:
+                log_n = math.log(visits[i] or 1)
+                best = -1.0
+                for p in moves:
+                    child = i + step * _POW3[p]
+                    n = visits[child]
+                    score = reward[child] / n + c * math.sqrt(log_n / n)
+                    if score > best:
+                        best, pos = score, p
+
+            i += step * _POW3[pos]
+            path.append(i)
+            movers.append(0 if x_to_move else 1)
+            if x_to_move:
+                x |= 1 << pos
+                won = WIN_AT[pos][x]
+            else:
+                o |= 1 << pos
+                won = WIN_AT[pos][o]
+            if won:
+                outcome = _X_WIN if x_to_move else _O_WIN
+                break
+            x_to_move = not x_to_move
+            if not visits[i]:
+                outcome = self.playout(x, o, x_to_move, rng)
+                break
+
+        visits[path[0]] += 1
+        for k in range(1, len(path)):
+            visits[path[k]] += 1
+            reward[path[k]] += _REWARD[movers[k]][outcome]
+
+    # search from the board for the budget. Returns the number of iterations
+    def search(self, b, rng=random):
+        # keep the stats if the board follows from the last one searched,
+        # otherwise it is a new game
+        if b.x & self.root_x != self.root_x or b.o & self.root_o != self.root_o:
+            self.reset()
+        self.root_x, self.root_o = b.x, b.o
+
+        x_to_move = b.turn == 'x'
+        done = 0
+        deadline = (None if self.time_limit is None
+                    else time.perf_counter() + self.time_limit)
+        while self.iterations is None or done < self.iterations:
+            self.iterate(b.x, b.o, x_to_move, rng)
+            done += 1
+            # checking the clock costs about as much as a playout, so only
+            # do it every few iterations
+            if (deadline is not None and done % 16 == 0
+                    and time.perf_counter() >= deadline):
+                break
+        return done
+
+    # pick a move for the board like get_computer_move does: search, then
+    # play the valid position that was visited the most, ties broken with rng
+    def choose(self, b, valid_pos, rng=random):
+        self.search(b, rng)
+        i = b.index()
+        step = 2 if b.turn == 'x' else 1
+        counts = [self.visits[i + step * _POW3[p]] for p in valid_pos]
+        m = max(counts)
+        return rng.choice([p for p, n in zip(valid_pos, counts) if n == m])
+
+    # how it is shown in the menus
+    def describe(self):
+        budget = []
+        if self.iterations is not None:
+            budget.append(f"{self.iterations} iterations")
+        if self.time_limit is not None:
+            budget.append(f"{self.time_limit:g}s")
+        guide = ", guided" if self.guide is not None else ""
+        return f"mcts ({' or '.join(budget)} per move{guide})"
+
+
+# add the command line flags of the MCTS player to a parser
+def add_arguments(parser):
+    parser.add_argument('--mcts-iterations', type=int, default=None,
+                        metavar='N', help="iterations per move of the MCTS "
+                                          f"player (default {DEFAULT_ITERATIONS})")
+    parser.add_argument('--mcts-time', type=float, default=None,
+                        metavar='SECONDS', help="time per move of the MCTS "
+                                                "player")
+    parser.add_argument('--mcts-guide', type=int, default=None, metavar='ID',
+                        help="guide the playouts of the MCTS player with the "
+                             "moves of this player")
+
+
+# the MCTS player the flags from add_arguments ask for, guided by one of the
+# strategies if a guide was given
+def from_args(args, strategies):
+    guide = None
+    if args.mcts_guide is not None:
+        guide = strategies[args.mcts_guide]
+    return MCTS(args.mcts_iterations, args.mcts_time, guide)
@@ -0,0 +1,242 @@
+import argparse
+import functools
+import random
+
+from dataset import COLUMNS, load_dataset
+
+
+# most cells a board can have, so every position fits in a uint16
+MAX_CELLS = 1 << 16
+
+
+class Rules:
+    '''
+    Rules of the m,n,k game: m rows, n columns, and the first to get k in a
+    row (across, down or diagonally) wins. Tic tac toe is 3,3,3. Cell c is at
+    row c // n and column c % n, and bit c of a big int bitboard. Every line
+    of k cells is precomputed as a mask, and so are the lines through every
+    cell, which are the only ones a move there can complete.
+    '''
+
+    def __init__(self, m, n, k):
+        if not 1 <= k <= max(m, n):
+            raise ValueError(f"k must be from 1 to {max(m, n)}")
+        # moves are read into uint16 columns (see dataset.py)
+        if m * n > MAX_CELLS:
+            raise ValueError(f"boards can have at most {MAX_CELLS} cells")
+        self.m, self.n, self.k = m, n, k
+        self.cells = m * n
+        self.full_mask = (1 << self.cells) - 1
+
+        lines = []
+        for r in range(m):
+            for c in range(n):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < m and 0 <= end_c < n:
+                        lines.append(sum(1 << ((r + dr * i) * n + c + dc * i)
+                                         for i in range(k)))
+        self.lines = tuple(lines)
+        self.lines_through = tuple(
+            tuple(line for line in lines if line >> cell & 1)
+            for cell in range(self.cells))
+
+    def __repr__(self):
+        return f"Rules({self.m}, {self.n}, {self.k})"
+
+    # an empty board with these rules
+    def new_board(self):
+        return MNKBoard(self)
+
+
+# the Rules of a size, made once and shared by every board of that size
+@functools.lru_cache(maxsize=None)
+def rules(m, n, k):
+    return Rules(m, n, k)
+
+
+# the rules for a size given as "m,n,k" (or "n,k" for a square board)
+def parse_size(size):
+    parts = [int(p) for p in size.split(',')]
+    if len(parts) == 2:
+        parts = [parts[0]] + parts
+    if len(parts) != 3:
+        raise ValueError("size must be m,n,k or n,k")
+    return rules(*parts)
+
+
+class MNKBoard:
+    '''
+    Board of any m,n,k game with the same interface as Board, so the game
+    loops, get_computer_move and the simulations work on it. The spots of X
+    and of O are big int bitboards, and a move only checks the lines through
+    its cell for a win.
+    '''
+    __slots__ = ('rules', 'x', 'o', 'turn', 'won')
+
+    def __init__(self, rules, x=0, o=0):
+        self.rules = rules
+        self.x = x
+        self.o = o
+        self.turn = 'x' if bin(x).count('1') == bin(o).count('1') else 'o'
+        self.won = ' '
+        for line in rules.lines:
+            if x & line == line:
+                self.won = 'x'
+            elif o & line == line:
+                self.won = 'o'
+
+    # make a board from the str made by to_str
+    @classmethod
+    def from_str(cls, rules, str_board):
+        x = sum(1 << c for c, v in enumerate(str_board) if v == 'x')
+        o = sum(1 << c for c, v in enumerate(str_board) if v == 'o')
+        return cls(rules, x, o)
+
+    def __getitem__(self, pos):
+        bit = 1 << pos
+        if self.x & bit:
+            return 'X'
+        if self.o & bit:
+            return 'O'
+        return ' '
+
+    def copy(self):
+        b = MNKBoard.__new__(MNKBoard)
+        b.rules, b.x, b.o, b.turn, b.won = (self.rules, self.x, self.o,
+                                            self.turn, self.won)
+        return b
+
+    # place the mark of the player whose turn it is at pos
+    def play(self, pos):
+        if self.turn == 'x':
+            self.x |= 1 << pos
+            mask = self.x
+        else:
+            self.o |= 1 << pos
+            mask = self.o
+        for line in self.rules.lines_through[pos]:
+            if mask & line == line:
+                self.won = self.turn
+                break
+        self.turn = 'o' if self.turn == 'x' else 'x'
+
+    # place the mark of side ('x' or 'o') at pos, no matter whose turn it is
+    def put(self, pos, side):
+        self.turn = side
+        self.play(pos)
+
+    # take back the last move, which was made at pos
+    def undo(self, pos):
+        bit = ~(1 << pos)
+        self.x &= bit
+        self.o &= bit
+        self.turn = 'o' if self.turn == 'x' else 'x'
+        self.won = ' '
+
+    # list of the empty positions, lowest first
+    def legal_moves(self):
+        empty = self.rules.full_mask ^ (self.x | self.o)
+        # the bits of empty lowest first, scanning the str is faster than
+        # peeling the bits off a big int one at a time
+        return [c for c, bit in enumerate(bin(empty)[:1:-1]) if bit == '1']
+
+    def is_full(self):
+        return self.x | self.o == self.rules.full_mask
+
+    def winner(self):
+        return self.won
+
+    # str representation with a '-', 'o' or 'x' per cell, like board_to_str
+    def to_str(self):
+        cells = self.rules.cells
+        # bits of both boards lowest cell first, as strings of 0 and 1
+        xs = bin(self.x)[2:].zfill(cells)[::-1]
+        os_ = bin(self.o)[2:].zfill(cells)[::-1]
+        return ''.join('x' if a == '1' else 'o' if b == '1' else '-'
+                       for a, b in zip(xs, os_))
+
+    # the board as rows of cells, each starting with the position of its
+    # first cell, for printing
+    def render(self):
+        n = self.rules.n
+        width = len(str(self.rules.cells - 1))
+        lines = []
+        for r in range(self.rules.m):
+            cells = []
+            for c in range(n):
+                mark = self[r * n + c]
+                cells.append((mark if mark != ' ' else '.').rjust(width))
+            lines.append(f"{r * n:>{width}} | " + ' '.join(cells))
+        return '\n'.join(lines) + '\n'
+
+
+# the move a player with the given skill (0 to 1) makes: with prob skill it
+# wins if it can and otherwise blocks a win of the other player, the rest of
+# the time (and when there is nothing to win or block) it plays at random
+def heuristic_move(b, skill, rng):
+    moves = b.legal_moves()
+    if rng.random() < skill:
+        for side in (b.turn, 'o' if b.turn == 'x' else 'x'):
+            for pos in moves:
+                trial = b.copy()
+                trial.put(pos, side)
+                if trial.winner() == side:
+                    return pos
+    return rng.choice(moves)
+
+
+# play games between num_players heuristic players of rising skill and
+# write them in the tictactoe-data.csv format, so the imitation pipeline
+# (load_dataset, get_results, train_for_strats) can run on them
+def write_games(rules, path, num_games, num_players=10, seed=0):
+    rng = random.Random(seed)
+    skill = {p: p / num_players for p in range(1, num_players + 1)}
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for game_id in range(1, num_games + 1):
+            x, o = rng.sample(sorted(skill), 2)
+            b = rules.new_board()
+            move_id = 0
+            while b.winner() == ' ' and not b.is_full():
+                move_id += 1
+                pre = b.to_str()
+                pos = heuristic_move(b, skill[x if b.turn == 'x' else o], rng)
+                b.play(pos)
+                f.write(f"{game_id},{x},{o},{move_id},{pre},{pos},"
+                        f"{b.to_str()}\n")
+
+
+def main():
+    # the game modules import this one, so they are imported here
+    from simulation import print_results, round_robin
+    from tic_tac_toe import get_results, train_for_strats
+
+    parser = argparse.ArgumentParser(
+        description="Run the imitation pipeline on a bigger m,n,k game: "
+                    "generate games, train the player models on them and "
+                    "play a round-robin between the models")
+    parser.add_argument('--size', default='4,4,4',
+                        help="m,n,k (or n,k for a square board)")
+    parser.add_argument('--games', type=int, default=2000,
+                        help="number of games to generate")
+    parser.add_argument('--data', default='mnk-data.csv',
+                        help="csv file to write the games to")
+    parser.add_argument('-n', type=int, default=20,
+                        help="games per pairing in the round-robin")
+    args = parser.parse_args()
+
+    try:
+        size = parse_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    write_games(size, args.data, args.games)
+    data = load_dataset(args.data)
+    players = get_results(data, out_file=None, rules=size)
+    strats = train_for_strats(data, players, seed=0)
+    print_results(round_robin(strats, args.n, size))
+
+
+if __name__ == '__main__':
+    main()
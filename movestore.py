@@ -0,0 +1,179 @@
+import argparse
+import os
+
+import numpy as np
+
+from board import WINNING_COMBOS
+
+
+# codes of the winner column
+TIE, X_WIN, O_WIN = 0, 1, 2
+
+# columns of a MoveStore and their dtypes. Every column is saved as its own
+# .npy file in the store directory
+COLUMNS = {'game_id': np.int64, 'player_x': np.int32, 'player_o': np.int32,
+           'winner': np.uint8, 'offsets': np.int64, 'moves': np.uint8}
+
+
+class GameRecord:
+    '''
+    A single game read from a MoveStore. moves_x and moves_o are views into
+    the moves column of the store, not copies.
+    '''
+    __slots__ = ('game_id', 'player_x', 'player_o', 'winner',
+                 'moves_x', 'moves_o')
+
+    def __init__(self, game_id, player_x, player_o, winner, moves):
+        self.game_id  = game_id
+        self.player_x = player_x
+        self.player_o = player_o
+        self.winner   = winner
+        # x makes the 1st, 3rd, ... move and o the 2nd, 4th, ...
+        self.moves_x  = moves[0::2]
+        self.moves_o  = moves[1::2]
+
+    def __repr__(self):
+        return (f"GameRecord({self.game_id}, x={self.player_x}, "
+                f"o={self.player_o}, winner={'-xo'[self.winner]}, "
+                f"moves_x={self.moves_x.tolist()}, "
+                f"moves_o={self.moves_o.tolist()})")
+
+
+class MoveStore:
+    '''
+    Columnar store of the games in the data. There is a row per game with its
+    game_id, players and winner, and all the moves are kept in a single uint8
+    column in the order they were played. The moves of game g are
+    moves[offsets[g]:offsets[g+1]], so a move costs one byte.
+    '''
+
+    def __init__(self, game_id, player_x, player_o, winner, offsets, moves):
+        self.game_id  = game_id
+        self.player_x = player_x
+        self.player_o = player_o
+        self.winner   = winner
+        self.offsets  = offsets
+        self.moves    = moves
+
+    def __len__(self):
+        return len(self.game_id)
+
+    # the GameRecord of the g-th game in the store
+    def game(self, g):
+        lo, hi = self.offsets[g], self.offsets[g+1]
+        return GameRecord(int(self.game_id[g]), int(self.player_x[g]),
+                          int(self.player_o[g]), int(self.winner[g]),
+                          self.moves[lo:hi])
+
+    # positions of the games a player played as x, as o, or either (xo=None)
+    def games_of(self, player_id, xo=None):
+        if xo == 'x':
+            mask = self.player_x == player_id
+        elif xo == 'o':
+            mask = self.player_o == player_id
+        else:
+            mask = (self.player_x == player_id) | (self.player_o == player_id)
+        return np.flatnonzero(mask)
+
+    # the moves a player made as x or o, as a dict of game_id -> moves, like
+    # Player.moves_as_x and Player.moves_as_o
+    def player_moves(self, player_id, xo):
+        moves = {}
+        for g in self.games_of(player_id, xo).tolist():
+            record = self.game(g)
+            moves[record.game_id] = (record.moves_x if xo == 'x'
+                                     else record.moves_o)
+        return moves
+
+    # record of a player in the same format as Player.record
+    def record(self, player_id):
+        as_x = self.player_x == player_id
+        as_o = self.player_o == player_id
+        win  = (as_x & (self.winner == X_WIN)) | (as_o & (self.winner == O_WIN))
+        loss = (as_x & (self.winner == O_WIN)) | (as_o & (self.winner == X_WIN))
+        tie  = (as_x | as_o) & (self.winner == TIE)
+        return {"win": int(win.sum()), "loss": int(loss.sum()),
+                "tie": int(tie.sum())}
+
+    # ids of all the players in the store
+    def player_ids(self):
+        return np.union1d(self.player_x, self.player_o).tolist()
+
+    # save every column as a .npy file in the directory path
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+
+    # save every column into a single .npz file
+    def save_npz(self, path):
+        np.savez(path, **{name: getattr(self, name) for name in COLUMNS})
+
+
+# build a MoveStore from a Dataset (see dataset.py). The winner of every game
+# is found on its last board. Only tic tac toe games fit, the winning combos
+# and the one byte per move are for a 3x3 board
+def from_dataset(data):
+    if data.pre.shape[1] != 9:
+        raise ValueError(f"a MoveStore only holds tic tac toe games, not "
+                         f"boards of {data.pre.shape[1]} cells")
+    last = data.post[data.starts[1:] - 1]
+    lines = last[:, np.array(WINNING_COMBOS)]
+    # encoded cells are 2 for x and 1 for o
+    x_won = (lines == 2).all(axis=2).any(axis=1)
+    o_won = (lines == 1).all(axis=2).any(axis=1)
+    winner = np.where(x_won, X_WIN, np.where(o_won, O_WIN, TIE))
+
+    columns = (data.game_id, data.player_x, data.player_o, winner,
+               data.starts, data.move)
+    return MoveStore(*(np.asarray(col, dtype=dtype)
+                       for col, dtype in zip(columns, COLUMNS.values())))
+
+
+# load a MoveStore saved with MoveStore.save. The columns are memory mapped,
+# so nothing is read until it is used
+def load_store(path):
+    return MoveStore(*(np.load(os.path.join(path, name + '.npy'),
+                               mmap_mode='r') for name in COLUMNS))
+
+
+# load a MoveStore saved with MoveStore.save_npz
+def load_npz(path):
+    with np.load(path) as f:
+        return MoveStore(*(f[name] for name in COLUMNS))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the columnar store of the games or query it")
+    parser.add_argument('--data', default="tictactoe-data.csv",
+                        help="csv file with the games")
+    parser.add_argument('--store', default="results-store",
+                        help="directory of the store")
+    parser.add_argument('--build', action='store_true',
+                        help="(re)build the store from --data")
+    parser.add_argument('--npz', default=None,
+                        help="also export the store to this .npz file")
+    parser.add_argument('--player', type=int, default=None,
+                        help="show the record and games of this player")
+    args = parser.parse_args()
+
+    if args.build:
+        from dataset import load_dataset
+        store = from_dataset(load_dataset(args.data))
+        store.save(args.store)
+    else:
+        store = load_store(args.store)
+    if args.npz is not None:
+        store.save_npz(args.npz)
+
+    print(f"{len(store)} games, {len(store.moves)} moves, "
+          f"{len(store.player_ids())} players")
+    if args.player is not None:
+        print(f"record: {store.record(args.player)}")
+        for g in store.games_of(args.player).tolist():
+            print(store.game(g))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import random
+
+import numpy as np
+
+from board import Board
+from movestore import O_WIN, X_WIN, from_dataset
+from symmetry import (CANONICAL, CANONICAL_TRANSFORM, from_canonical_move,
+                      to_canonical_move)
+
+
+# how deep the book players follow the book by default, in moves
+BOOK_DEPTH = 4
+
+
+class OpeningBook:
+    '''
+    Prefix trie of the move sequences of all games in the data. Node 0 is the
+    empty board and children[n, m] is the node reached by playing m after the
+    moves of node n (-1 if no game did). For every node there are per-player
+    counts of the games that got there, stored as (nodes, players) arrays with
+    a column per player: how many games the player made the last move of the
+    node in, and how many of those they won and lost. A query walks the trie
+    one move at a time, so it costs the number of moves in it.
+    '''
+
+    def __init__(self, children, board, depth, players, visits, wins, losses):
+        self.children = children
+        self.board    = board
+        self.depth    = depth
+        self.players  = players
+        self.visits   = visits
+        self.wins     = wins
+        self.losses   = losses
+        self.column   = {p: k for k, p in enumerate(players.tolist())}
+
+    def __len__(self):
+        return len(self.children)
+
+    # the node of a sequence of moves, -1 if no game started with them
+    def node(self, moves):
+        n = 0
+        for m in moves:
+            n = int(self.children[n, m])
+            if n < 0:
+                break
+        return n
+
+    # counts of the nodes in a (nodes, players) array for a player, or summed
+    # over every player if player is None
+    def _counts(self, counts, nodes, player):
+        if player is None:
+            return counts[nodes].sum(axis=1)
+        if player not in self.column:
+            return np.zeros(len(nodes), dtype=counts.dtype)
+        return counts[nodes, self.column[player]]
+
+    # how often every move was played after the moves by the player (or by
+    # anyone), as a dict of move -> games
+    def move_counts(self, moves, player=None):
+        return {m: s['games'] for m, s in self.move_stats(moves, player).items()}
+
+    # games, wins, losses and ties of every move played after the moves, for
+    # the player that made it (or anyone), as a dict of move -> stats
+    def move_stats(self, moves, player=None):
+        n = self.node(moves)
+        if n < 0:
+            return {}
+        child = self.children[n]
+        played = np.flatnonzero(child >= 0)
+        nodes = child[played]
+        games  = self._counts(self.visits, nodes, player).tolist()
+        wins   = self._counts(self.wins, nodes, player).tolist()
+        losses = self._counts(self.losses, nodes, player).tolist()
+
+        stats = {}
+        for m, g, w, l in zip(played.tolist(), games, wins, losses):
+            if g:
+                stats[m] = {'games': g, 'win': w, 'loss': l,
+                            'tie': g - w - l, 'win_rate': w / g}
+        return stats
+
+    # the moves played most by the player (or anyone) from every board up to
+    # max_depth moves in, as a dict of Board.index -> moves. Games that got
+    # to a board through different move orders are added up. With
+    # canonical=True the symmetric versions of a board are added up too, and
+    # the dict is keyed by canonical index with moves on the canonical board
+    def board_moves(self, player=None, max_depth=BOOK_DEPTH, min_games=1,
+                    canonical=False):
+        parent, move = np.nonzero(self.children >= 0)
+        keep = self.depth[parent] < max_depth
+        parent, move = parent[keep], move[keep]
+        games = self._counts(self.visits, self.children[parent, move], player)
+
+        totals = {}
+        for i, m, g in zip(self.board[parent].tolist(), move.tolist(),
+                           games.tolist()):
+            if canonical:
+                m = to_canonical_move(m, int(CANONICAL_TRANSFORM[i]))
+                i = int(CANONICAL[i])
+            if g:
+                counts = totals.setdefault(i, [0] * 9)
+                counts[m] += g
+
+        best = {}
+        for i, counts in totals.items():
+            top = max(counts)
+            if top >= min_games:
+                best[i] = tuple(m for m in range(9) if counts[m] == top)
+        return best
+
+    def save(self, path):
+        np.savez(path, children=self.children, board=self.board,
+                 depth=self.depth, players=self.players, visits=self.visits,
+                 wins=self.wins, losses=self.losses)
+
+
+# build the OpeningBook of the games in a MoveStore (see movestore.py)
+def build_book(store):
+    offsets = np.asarray(store.offsets).tolist()
+    all_moves = np.asarray(store.moves).tolist()
+
+    # the trie can't have more nodes than there are moves, plus the root
+    children = np.full((len(all_moves) + 1, 9), -1, dtype=np.int32)
+    board = [0]
+    node_of_move = []
+    for g in range(len(store)):
+        n, b = 0, Board()
+        for m in all_moves[offsets[g]:offsets[g+1]]:
+            b.play(m)
+            child = children[n, m]
+            if child < 0:
+                child = children[n, m] = len(board)
+                board.append(b.index())
+            n = int(child)
+            node_of_move.append(n)
+    children = children[:len(board)].copy()
+    board = np.array(board, dtype=np.int32)
+    depth = np.zeros(len(board), dtype=np.uint8)
+    depth[1:] = (np.asarray(board[1:])[:, None] // 3 ** np.arange(9) % 3
+                 != 0).sum(axis=1)
+
+    # who made every move and how their game ended
+    lengths = np.diff(store.offsets)
+    game_of_move = np.repeat(np.arange(len(store)), lengths)
+    move_no = np.arange(len(all_moves)) - np.repeat(store.offsets[:-1],
+                                                    lengths)
+    by_x = move_no % 2 == 0
+    mover = np.where(by_x, store.player_x[game_of_move],
+                     store.player_o[game_of_move])
+    winner = store.winner[game_of_move]
+    won  = np.where(by_x, winner == X_WIN, winner == O_WIN)
+    lost = np.where(by_x, winner == O_WIN, winner == X_WIN)
+
+    players, column = np.unique(mover, return_inverse=True)
+    nodes = np.array(node_of_move, dtype=np.int64)
+    shape = (len(board), len(players))
+    visits = np.zeros(shape, dtype=np.uint32)
+    wins   = np.zeros(shape, dtype=np.uint32)
+    losses = np.zeros(shape, dtype=np.uint32)
+    np.add.at(visits, (nodes, column), 1)
+    np.add.at(wins, (nodes[won], column[won]), 1)
+    np.add.at(losses, (nodes[lost], column[lost]), 1)
+    return OpeningBook(children, board, depth, players.astype(np.int32),
+                       visits, wins, losses)
+
+
+# build the OpeningBook of the games in a csv file
+def load_book(data_file):
+    from dataset import load_dataset
+    return build_book(from_dataset(load_dataset(data_file)))
+
+
+# load an OpeningBook saved with OpeningBook.save
+def load_npz(path):
+    with np.load(path) as f:
+        return OpeningBook(*(f[name] for name in (
+            'children', 'board', 'depth', 'players', 'visits', 'wins',
+            'losses')))
+
+
+class BookPlayer:
+    '''
+    A computer player that plays the move a player made most from a board
+    while the game is still in the opening book, and leaves the rest of the
+    game to its fallback strategy (see get_computer_move). With canonical=True
+    the moves made on the symmetric versions of a board count for it too.
+    '''
+
+    def __init__(self, book, player_id, fallback, max_depth=BOOK_DEPTH,
+                 canonical=False):
+        self.fallback = fallback
+        self.canonical = canonical
+        self.best = book.board_moves(player_id, max_depth,
+                                     canonical=canonical)
+
+    # the book move for the board with index i, None if it is out of book
+    def choose(self, i, valid_pos, rng=random):
+        if self.canonical:
+            t = int(CANONICAL_TRANSFORM[i])
+            moves = [from_canonical_move(m, t)
+                     for m in self.best.get(int(CANONICAL[i]), ())]
+        else:
+            moves = self.best.get(i, ())
+        moves = [m for m in moves if m in valid_pos]
+        return rng.choice(moves) if moves else None
+
+
+# the strategies with every player that has games in the book wrapped in a
+# BookPlayer
+def with_book(strategies, book, max_depth=BOOK_DEPTH, canonical=False):
+    return {i: BookPlayer(book, i, s, max_depth, canonical)
+            if i in book.column else s
+            for i, s in strategies.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the opening moves of the games in the data")
+    parser.add_argument('--data', default="tictactoe-data.csv",
+                        help="csv file with the games")
+    parser.add_argument('--player', type=int, default=None,
+                        help="only count the moves of this player")
+    parser.add_argument('moves', nargs='*', type=int,
+                        help="moves played so far, like 4 0")
+    args = parser.parse_args()
+
+    book = load_book(args.data)
+    stats = book.move_stats(args.moves, args.player)
+    print(f"{len(book)} nodes in the book")
+    if not stats:
+        print("no games with these moves")
+        return
+    print(f"\n{'move':>4} {'games':>6} {'win':>5} {'loss':>5} {'tie':>5} "
+          f"{'win %':>6}")
+    for m, s in sorted(stats.items(), key=lambda kv: -kv[1]['games']):
+        print(f"{m:>4} {s['games']:>6} {s['win']:>5} {s['loss']:>5} "
+              f"{s['tie']:>5} {s['win_rate']:>6.1%}")
+
+
+if __name__ == '__main__':
+    main()
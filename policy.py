@@ -0,0 +1,98 @@
+import random
+import numpy as np
+
+import instrument
+from symmetry import canonical_boards, from_canonical_probs
+
+
+# number of possible 3x3 boards, counting unreachable ones. Each board gets an
+# index by reading its cells as a base-3 number, cell 0 being the lowest digit
+NUM_BOARDS = 3 ** 9
+
+# every board as a row of encoded cells, row i being the board with index i
+def all_encoded_boards():
+    idx = np.arange(NUM_BOARDS)
+    return np.stack([(idx // 3 ** c) % 3 for c in range(9)], axis=1)
+
+
+# number of empty spots on every board, and the cells in each 9-bit mask
+_NUM_EMPTY  = (all_encoded_boards() == 0).sum(axis=1).tolist()
+_MASK_CELLS = [tuple(c for c in range(9) if m >> c & 1) for m in range(512)]
+
+
+# 9-bit mask per board of the empty positions with the highest prob, which are
+# the moves a strategy with these probabilities picks from
+def best_move_masks(probs):
+    empty  = all_encoded_boards() == 0
+    masked = np.where(empty, probs, -1.0)
+    best   = (masked == masked.max(axis=1, keepdims=True)) & empty
+    return (best * (1 << np.arange(9))).sum(axis=1).astype(np.uint16)
+
+
+class PolicyTable:
+    '''
+    A trained strategy compiled into a table with a row for every board. Each
+    row holds the probabilities that the DecisionTreeClassifier gives to
+    playing in every position, and the positions that would be picked when
+    any empty spot can be played, so picking a move is a lookup instead of a
+    call to predict_proba. probs and best_mask can be memory-mapped arrays.
+    '''
+
+    def __init__(self, probs, best_mask=None):
+        self.probs = probs
+        self.best_mask = best_move_masks(probs) if best_mask is None else best_mask
+        self.num_empty = _NUM_EMPTY
+        # best empty positions of every board, ties included
+        self.best_moves = [_MASK_CELLS[m] for m in self.best_mask.tolist()]
+
+    # pick a move for the board with index i (see Board.index) the same way
+    # get_computer_move does with the tree: the valid position with the
+    # highest prob, ties broken at random with rng
+    def choose(self, i, valid_pos, rng=random):
+        # valid positions are always empty, so if there are as many of them as
+        # empty spots they are the same and the best moves are precomputed
+        if len(valid_pos) == self.num_empty[i]:
+            return rng.choice(self.best_moves[i])
+
+        s = self.probs[i]
+        m = max(s[p] for p in valid_pos)
+        return rng.choice([p for p in valid_pos if s[p] == m])
+
+
+# move probabilities of a trained DecisionTreeClassifier for every row of
+# (n, cells) encoded boards, as an (n, cells) array. The tree only has a
+# column for positions it saw played, the others are 0. A tree trained on
+# canonical boards (canonical=True in train_for_strats) predicts for the
+# canonical version of every board, and its moves are mapped back to the
+# board. There are only canonical boards for tic tac toe
+def tree_probs(strat, boards):
+    boards = np.asarray(boards)
+    canonical_tree = (getattr(strat, 'canonical', False)
+                      and boards.shape[1] == 9)
+    if canonical_tree:
+        boards, t = canonical_boards(boards)
+
+    probs = np.zeros(boards.shape)
+    probs[:, strat.classes_.astype(int)] = strat.predict_proba(boards)
+    if canonical_tree:
+        probs = from_canonical_probs(probs, t)
+    return probs
+
+
+# compile a trained DecisionTreeClassifier into a PolicyTable with a single
+# predict_proba call over every board
+def compile_policy(strat):
+    return PolicyTable(tree_probs(strat, all_encoded_boards()))
+
+
+# compile every strategy from train_for_strats. Strategies that are the same
+# model share a single table
+@instrument.phase('compile_strategies')
+def compile_strategies(strategies):
+    tables = {}
+    compiled = {}
+    for player, strat in strategies.items():
+        if id(strat) not in tables:
+            tables[id(strat)] = compile_policy(strat)
+        compiled[player] = tables[id(strat)]
+    return compiled
@@ -0,0 +1,322 @@
+import argparse
+import os
+
+import numpy as np
+
+from movestore import O_WIN, TIE, X_WIN
+
+
+# games per rating period. Ratings are only updated at the end of a period,
+# from the ratings everyone had at its start, and the games of a period that
+# isn't full yet wait for it. Every period has a fixed cost on top of its
+# games, so short periods follow the games closely but rate big logs slowly
+# (100M games take a few minutes with periods of 1000 games or more, ten
+# times as long with 20). Glicko-2 also wants every player to play a few
+# games in a period, so the period should grow with the number of players
+# (about 5M games for 1M players), and small logs like the 220 games of the
+# data need a short one
+DEFAULT_PERIOD = 1000
+
+# games update handles at a time
+_CHUNK = 1 << 20
+
+# Elo
+ELO_START = 1500.0
+ELO_K     = 32.0
+
+# Glicko-2 (see Glickman, "Example of the Glicko-2 system"). Ratings are
+# kept on the Glicko-2 scale and shown on the Glicko one
+GLICKO_SCALE = 173.7178
+RD_START     = 350.0
+SIGMA_START  = 0.06
+TAU          = 0.5
+_EPSILON     = 1e-6
+
+# score of the x player for every winner code of movestore
+_X_SCORE = np.zeros(3)
+_X_SCORE[X_WIN], _X_SCORE[O_WIN], _X_SCORE[TIE] = 1.0, 0.0, 0.5
+
+
+def _g(phi):
+    return 1 / np.sqrt(1 + 3 * phi ** 2 / np.pi ** 2)
+
+
+def _expected(mu, mu_opp, g_opp):
+    return 1 / (1 + np.exp(-g_opp * (mu - mu_opp)))
+
+
+# new volatilities of players with the given delta, phi, v and sigma, found
+# with the Illinois algorithm of step 5 of Glicko-2, for all of them at once
+def _volatility(delta, phi, v, sigma, tau=TAU):
+    a = np.log(sigma ** 2)
+
+    def f(x):
+        ex = np.exp(x)
+        return (ex * (delta ** 2 - phi ** 2 - v - ex)
+                / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2)
+
+    A = a.copy()
+    big = delta ** 2 > phi ** 2 + v
+    B = np.where(big, np.log(np.maximum(delta ** 2 - phi ** 2 - v, 1e-300)),
+                 a - tau)
+    # for the others step down from a until f is no longer negative
+    todo = ~big & (f(B) < 0)
+    while todo.any():
+        B[todo] -= tau
+        todo &= f(B) < 0
+
+    fA, fB = f(A), f(B)
+    todo = np.abs(B - A) > _EPSILON
+    for _ in range(100):
+        if not todo.any():
+            break
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        flip = todo & (fC * fB < 0)
+        A  = np.where(flip, B, A)
+        fA = np.where(flip, fB, np.where(todo, fA / 2, fA))
+        B  = np.where(todo, C, B)
+        fB = np.where(todo, fC, fB)
+        todo &= np.abs(B - A) > _EPSILON
+    return np.exp(A / 2)
+
+
+class Ratings:
+    '''
+    Elo and Glicko-2 ratings of every player, kept apart for when they play X
+    and when they play O, so the advantage of going first doesn't skew them.
+    Every player has two sides, X at slot 2k and O at slot 2k+1 of the
+    arrays, and a game is the X side of one player against the O side of the
+    other. Games are taken in game_id order in rating periods of a fixed
+    number of games, and every period is done as a batch of NumPy operations
+    over its games and the sides that play in them, so it costs the same
+    however many players there are. Only full
+    periods are rated, the games of the last one are kept until it fills up,
+    so updating with more games carries on from where the last update stopped
+    and ends up the same as rating all the games at once.
+    '''
+
+    def __init__(self, period=DEFAULT_PERIOD, k=ELO_K, tau=TAU):
+        self.period = period
+        self.k      = k
+        self.tau    = tau
+        self.ids    = np.zeros(0, dtype=np.int64)
+        self.elo    = np.zeros(0)
+        self.mu     = np.zeros(0)
+        self.phi    = np.zeros(0)
+        self.sigma  = np.zeros(0)
+        self.games  = np.zeros(0, dtype=np.int64)
+        # periods rated so far, and for every side the number of periods its
+        # phi is up to date with. Sides that don't play in a period only get
+        # less certain, which is caught up on the next time they are used
+        self.periods = 0
+        self.rated  = np.zeros(0, dtype=np.int64)
+        self.last_game_id = -1
+        # games of the period that isn't full yet: x and o ids and winner
+        self.pending_x = np.zeros(0, dtype=np.int64)
+        self.pending_o = np.zeros(0, dtype=np.int64)
+        self.pending_winner = np.zeros(0, dtype=np.int64)
+        self._sorted = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # rows of the given player ids, adding the players not seen before
+    def rows(self, player_ids):
+        # look up every distinct id once, in sorted order
+        uniq, inverse = np.unique(np.asarray(player_ids, dtype=np.int64),
+                                  return_inverse=True)
+        known = self.ids[self._sorted]
+        at = np.searchsorted(known, uniq)
+        found = at < len(known)
+        found[found] = known[at[found]] == uniq[found]
+        new = uniq[~found]
+        if len(new):
+            n = 2 * len(new)
+            self.ids   = np.r_[self.ids, new]
+            self.elo   = np.r_[self.elo, np.full(n, ELO_START)]
+            self.mu    = np.r_[self.mu, np.zeros(n)]
+            self.phi   = np.r_[self.phi, np.full(n, RD_START / GLICKO_SCALE)]
+            self.sigma = np.r_[self.sigma, np.full(n, SIGMA_START)]
+            self.games = np.r_[self.games, np.zeros(n, dtype=np.int64)]
+            self.rated = np.r_[self.rated, np.full(n, self.periods)]
+            self._sorted = np.argsort(self.ids, kind='stable')
+            known = self.ids[self._sorted]
+        return self._sorted[np.searchsorted(known, uniq)][inverse]
+
+    # add the games with the given x and o ids and winner codes (see
+    # movestore.py), which must be in game_id order, and rate every period
+    # that is full. game_ids can be given to skip the games already added by
+    # an earlier update
+    def update(self, player_x, player_o, winner, game_ids=None):
+        player_x, player_o = np.asarray(player_x), np.asarray(player_o)
+        winner = np.asarray(winner)
+        if game_ids is not None:
+            # the games are in game_id order, so the new ones are at the end
+            game_ids = np.asarray(game_ids)
+            first = np.searchsorted(game_ids, self.last_game_id, 'right')
+            player_x, player_o = player_x[first:], player_o[first:]
+            winner = winner[first:]
+            if first < len(game_ids):
+                self.last_game_id = int(game_ids[-1])
+
+        # a chunk at a time, so the arrays made here stay small however
+        # many games there are
+        for lo in range(0, len(winner), _CHUNK):
+            hi = lo + _CHUNK
+            self._add(player_x[lo:hi], player_o[lo:hi], winner[lo:hi])
+
+    # add games after the ones of the unfinished period and rate every
+    # period that is full
+    def _add(self, player_x, player_o, winner):
+        player_x = np.r_[self.pending_x, player_x].astype(np.int64)
+        player_o = np.r_[self.pending_o, player_o].astype(np.int64)
+        winner = np.r_[self.pending_winner, winner].astype(np.int64)
+        rows = self.rows(np.r_[player_x, player_o])
+        x_side = 2 * rows[:len(player_x)]
+        o_side = 2 * rows[len(player_x):] + 1
+        score = _X_SCORE[winner]
+
+        full = len(score) - len(score) % self.period
+        for lo in range(0, full, self.period):
+            hi = lo + self.period
+            self.rate_period(x_side[lo:hi], o_side[lo:hi], score[lo:hi])
+        self.pending_x = player_x[full:]
+        self.pending_o = player_o[full:]
+        self.pending_winner = winner[full:]
+
+    # phi of the given sides now, adding the growth of the periods they
+    # didn't play in since they were last rated. Growing for p periods in a
+    # row is the same as growing once by p times sigma^2, up to RD_START
+    def current_phi(self, sides):
+        idle = self.periods - self.rated[sides]
+        phi, sigma = self.phi[sides], self.sigma[sides]
+        grown = np.minimum(np.sqrt(phi ** 2 + idle * sigma ** 2),
+                           RD_START / GLICKO_SCALE)
+        return np.where(idle > 0, grown, phi)
+
+    # one rating period of games between sides a and b, where a scored score.
+    # Only the sides that play in it are touched, so a period costs time in
+    # proportion to its games, not to the number of players
+    def rate_period(self, a, b, score):
+        # the sides of the period, and a and b as positions among them
+        sides, inverse = np.unique(np.r_[a, b], return_inverse=True)
+        a, b = inverse[:len(a)], inverse[len(a):]
+        n = len(sides)
+        self.games[sides] += (np.bincount(a, minlength=n)
+                              + np.bincount(b, minlength=n))
+
+        # Elo, every game against the ratings at the start of the period
+        elo = self.elo[sides]
+        e = 1 / (1 + 10 ** ((elo[b] - elo[a]) / 400))
+        change = self.k * (score - e)
+        self.elo[sides] = (elo + np.bincount(a, change, minlength=n)
+                           - np.bincount(b, change, minlength=n))
+
+        # Glicko-2, steps 3 and 4 for both sides of every game
+        mu, phi = self.mu[sides], self.current_phi(sides)
+        g_a, g_b = _g(phi[a]), _g(phi[b])
+        e_a = _expected(mu[a], mu[b], g_b)
+        e_b = _expected(mu[b], mu[a], g_a)
+        v_inv = (np.bincount(a, g_b ** 2 * e_a * (1 - e_a), minlength=n)
+                 + np.bincount(b, g_a ** 2 * e_b * (1 - e_b), minlength=n))
+        dsum = (np.bincount(a, g_b * (score - e_a), minlength=n)
+                + np.bincount(b, g_a * ((1 - score) - e_b), minlength=n))
+
+        v = 1 / v_inv
+        sigma = _volatility(v * dsum, phi, v, self.sigma[sides], self.tau)
+        phi_star = np.sqrt(phi ** 2 + sigma ** 2)
+        new_phi = 1 / np.sqrt(1 / phi_star ** 2 + v_inv)
+        self.mu[sides] = mu + new_phi ** 2 * dsum
+        self.phi[sides] = new_phi
+        self.sigma[sides] = sigma
+
+        self.periods += 1
+        self.rated[sides] = self.periods
+
+    # the ratings of every player as a list of dicts, best Glicko X+O first
+    def standings(self):
+        glicko = GLICKO_SCALE * self.mu + 1500
+        rd = GLICKO_SCALE * self.current_phi(np.arange(len(self.phi)))
+        rows = []
+        for k, player in enumerate(self.ids.tolist()):
+            x, o = 2 * k, 2 * k + 1
+            rows.append({'player': player,
+                         'elo_x': float(self.elo[x]),
+                         'elo_o': float(self.elo[o]),
+                         'glicko_x': float(glicko[x]), 'rd_x': float(rd[x]),
+                         'glicko_o': float(glicko[o]), 'rd_o': float(rd[o]),
+                         'games_x': int(self.games[x]),
+                         'games_o': int(self.games[o])})
+        rows.sort(key=lambda r: -(r['glicko_x'] + r['glicko_o']))
+        return rows
+
+    def save(self, path):
+        np.savez(path, period=self.period, k=self.k, tau=self.tau,
+                 ids=self.ids, elo=self.elo, mu=self.mu, phi=self.phi,
+                 sigma=self.sigma, games=self.games, periods=self.periods,
+                 rated=self.rated,
+                 last_game_id=self.last_game_id, pending_x=self.pending_x,
+                 pending_o=self.pending_o, pending_winner=self.pending_winner)
+
+
+# load Ratings saved with Ratings.save, or new ones if there is no file
+def load_ratings(path, period=DEFAULT_PERIOD):
+    if path is None or not os.path.exists(path):
+        return Ratings(period)
+    with np.load(path) as f:
+        ratings = Ratings(int(f['period']), float(f['k']), float(f['tau']))
+        for name in ('ids', 'elo', 'mu', 'phi', 'sigma', 'games', 'rated',
+                     'pending_x', 'pending_o', 'pending_winner'):
+            setattr(ratings, name, f[name])
+        ratings.periods = int(f['periods'])
+        ratings.last_game_id = int(f['last_game_id'])
+    ratings._sorted = np.argsort(ratings.ids, kind='stable')
+    return ratings
+
+
+# rate the games of a MoveStore (see movestore.py) that are newer than the
+# last ones rated
+def rate_store(ratings, store):
+    ratings.update(np.asarray(store.player_x), np.asarray(store.player_o),
+                   np.asarray(store.winner), np.asarray(store.game_id))
+    return ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Elo and Glicko-2 ratings of the players, as X and as O")
+    parser.add_argument('--data', default="tictactoe-data.csv",
+                        help="csv file with the games")
+    parser.add_argument('--state', default=None,
+                        help="keep the ratings in this file and only rate "
+                             "the games that are newer than the ones in it")
+    parser.add_argument('--period', type=int, default=DEFAULT_PERIOD,
+                        help="games per rating period (only full periods "
+                             "are rated)")
+    parser.add_argument('--top', type=int, default=20,
+                        help="number of players to show")
+    args = parser.parse_args()
+
+    from dataset import load_dataset
+    from movestore import from_dataset
+    ratings = load_ratings(args.state, args.period)
+    rate_store(ratings, from_dataset(load_dataset(args.data)))
+    if args.state is not None:
+        ratings.save(args.state)
+
+    print(f"{'id':>4} {'elo x':>7} {'elo o':>7} {'glicko x':>12} "
+          f"{'glicko o':>12} {'games':>6}")
+    for r in ratings.standings()[:args.top]:
+        print(f"{r['player']:>4} {r['elo_x']:>7.0f} {r['elo_o']:>7.0f} "
+              f"{r['glicko_x']:>6.0f}±{r['rd_x']:<5.0f} "
+              f"{r['glicko_o']:>6.0f}±{r['rd_o']:<5.0f} "
+              f"{r['games_x'] + r['games_o']:>6}")
+    if len(ratings.pending_winner):
+        print(f"\n{len(ratings.pending_winner)} games wait for the period of "
+              f"{ratings.period} games to fill up (a smaller --period rates "
+              f"small logs)")
+
+
+if __name__ == '__main__':
+    main()
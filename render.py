@@ -0,0 +1,109 @@
+import sys
+import time
+
+import instrument
+from mnk import MNKBoard
+
+
+UNDERLINE = '\033[4m'
+RESET     = '\033[0m'
+
+# the underlined position numbers above every row of the 3x3 board, made once
+_NUMBERED = [''.join(UNDERLINE + num + '|' + RESET + '   |' for num in row)[:-1]
+             for row in (('0', '1', '2'), ('3', '4', '5'), ('6', '7', '8'))]
+_DIVIDER = '_____|_____|_____'
+
+
+# the whole picture of a board as one str, the same as print_board shows
+def board_frame(b):
+    if isinstance(b, MNKBoard):
+        return b.render() + '\n'
+    rows = []
+    for r in range(3):
+        if r:
+            rows.append(_DIVIDER)
+        rows.append(_NUMBERED[r])
+        rows.append(f'  {b[3*r]}  |  {b[3*r + 1]}  |  {b[3*r + 2]}  ')
+    return '\n'.join(rows) + '\n\n'
+
+
+class Renderer:
+    '''
+    Writes frames to a terminal, each built as one str and written with a
+    single write. With diff=True a frame is drawn over the last one, moving
+    the cursor up and rewriting only the lines that changed. Frames that come
+    less than min_interval seconds after the last one are dropped (unless
+    forced), so drawing never slows down what is being drawn. quiet drops
+    everything.
+    '''
+
+    def __init__(self, out=None, diff=False, min_interval=0.0, quiet=False):
+        self.out = sys.stdout if out is None else out
+        self.diff = diff
+        self.min_interval = min_interval
+        self.quiet = quiet
+        self.last_lines = None
+        self.last_time = 0.0
+
+    # write text as is, below whatever was drawn before
+    def write(self, text):
+        if not self.quiet:
+            self.out.write(text)
+            self.out.flush()
+            self.last_lines = None
+
+    # draw a frame, over the last one in diff mode. Returns whether it was
+    # drawn
+    @instrument.phase('render')
+    def frame(self, text, force=False):
+        if self.quiet:
+            return False
+        now = time.perf_counter()
+        if not force and now - self.last_time < self.min_interval:
+            return False
+        self.last_time = now
+
+        lines = text.split('\n')
+        prev = self.last_lines
+        if not self.diff or prev is None or len(prev) != len(lines):
+            self.out.write(text)
+        else:
+            # back to the first line of the last frame, then down line by
+            # line, clearing and rewriting the ones that changed
+            buf = [f'\033[{len(lines) - 1}F'] if len(lines) > 1 else ['\r']
+            for k, (old, new) in enumerate(zip(prev, lines)):
+                last = k == len(lines) - 1
+                if old != new:
+                    buf.append('\033[2K' + new + ('' if last else '\n'))
+                elif not last:
+                    buf.append('\033[E')
+            self.out.write(''.join(buf))
+        self.out.flush()
+        self.last_lines = lines
+        return True
+
+
+class Spectator:
+    '''
+    Shows only every Nth game of a long run of games, move by move, redrawn
+    in place. Games that aren't watched cost a single check per game.
+    '''
+
+    def __init__(self, every, renderer=None):
+        self.every = every
+        self.games = 0
+        self.renderer = (Renderer(diff=True, min_interval=1 / 30)
+                         if renderer is None else renderer)
+
+    # count a new game. Returns whether it is shown
+    def next_game(self):
+        self.games += 1
+        return self.every > 0 and (self.games - 1) % self.every == 0
+
+    # draw the board of the game being watched. The last frame of a game is
+    # always drawn, so its result is shown
+    def show(self, b, over=False, winner=' '):
+        caption = f"game {self.games}"
+        if over:
+            caption += ": " + ("tie" if winner == ' ' else f"{winner} wins")
+        self.renderer.frame(f"{caption:<20}\n" + board_frame(b), over)
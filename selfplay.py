@@ -0,0 +1,211 @@
+import argparse
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import O_CELL, X_CELL, play_lockstep
+from dataset import COLUMNS
+from policy import NUM_BOARDS, PolicyTable
+from solver import SOLVER_ID
+from tic_tac_toe import load_models
+
+
+# id of the random player in the generated games. The players in the data
+# start at 1, the perfect player is 0 and the MCTS player -1
+RANDOM_ID = -2
+
+# games played and written at a time. Memory use only depends on this, not on
+# how many rows are generated
+BATCH_GAMES = 20000
+
+# character of every encoded cell value, see tic_tac_toe.label_codes
+_CHARS = np.frombuffer(b'-ox', dtype=np.uint8)
+
+_HEADER = ','.join(COLUMNS) + '\n'
+
+
+# a player that picks any empty spot at random, as a PolicyTable so it can
+# play in lockstep with the others
+def random_player():
+    return PolicyTable(np.ones((NUM_BOARDS, 9)))
+
+
+# the strategies games can be generated with: the compiled trees, the perfect
+# player and the random player
+def generator_strategies(data_file):
+    strats = load_models(data_file)[1]
+    strats[RANDOM_ID] = random_player()
+    return strats
+
+
+# ids of the players in a spec like "trees", "1,2,solver" or "mixed". trees is
+# every player from the data, mixed is the trees plus solver and random
+def parse_players(spec, strategies):
+    trees = sorted(i for i in strategies if i > 0)
+    named = {'trees': trees, 'solver': [SOLVER_ID], 'random': [RANDOM_ID],
+             'mixed': trees + [SOLVER_ID, RANDOM_ID]}
+    ids = []
+    for part in spec.split(','):
+        part = part.strip().lower()
+        if part in named:
+            ids.extend(named[part])
+        elif part.lstrip('-').isdigit() and int(part) in strategies:
+            ids.append(int(part))
+        else:
+            raise ValueError(f"unknown player {part!r}")
+    return sorted(set(ids))
+
+
+# x and o ids of n games between players drawn at random from the pool. A
+# player never plays itself unless it is alone in the pool
+def draw_pairings(pool, n, rng):
+    pool = np.asarray(pool)
+    x = rng.integers(len(pool), size=n)
+    if len(pool) == 1:
+        return pool[x], pool[x]
+    o = (x + 1 + rng.integers(len(pool) - 1, size=n)) % len(pool)
+    return pool[x], pool[o]
+
+
+# the csv lines of a batch of games, numbered from first_id. moves is the
+# (n, 9) array filled in by play_lockstep
+def format_games(first_id, x_ids, o_ids, moves):
+    n = len(moves)
+    # encoded board after every number of moves, (n, 10, 9)
+    states = np.zeros((n, 10, 9), dtype=np.uint8)
+    for k in range(9):
+        states[:, k + 1] = states[:, k]
+        rows = np.flatnonzero(moves[:, k] >= 0)
+        states[rows, k + 1, moves[rows, k]] = X_CELL if k % 2 == 0 else O_CELL
+    strs = _CHARS[states].view('S9').reshape(n, 10)
+
+    lines = []
+    for g, (x, o, game_moves, game_strs) in enumerate(
+            zip(x_ids.tolist(), o_ids.tolist(), moves.tolist(),
+                strs.tolist())):
+        prefix = f"{first_id + g},{x},{o},"
+        for k, move in enumerate(game_moves):
+            if move < 0:
+                break
+            lines.append(f"{prefix}{k + 1},{game_strs[k].decode()},{move},"
+                         f"{game_strs[k + 1].decode()}\n")
+    return lines
+
+
+# open an output file, gzipped if the name ends in .gz
+def open_output(path):
+    if path.endswith('.gz'):
+        # level 1 keeps up with the generator, the higher ones don't
+        return gzip.open(path, 'wt', compresslevel=1, newline='')
+    return open(path, 'w', buffering=1 << 20, newline='')
+
+
+# play games between the players in pool until at least rows moves are
+# written to path, one batch at a time. Game ids start at first_id. Returns
+# the number of (games, rows) written
+def generate(strategies, pool, rows, path, first_id=1, seed=0,
+             batch_games=BATCH_GAMES):
+    rng = np.random.default_rng(seed)
+    games = written = 0
+    with open_output(path) as f:
+        f.write(_HEADER)
+        while written < rows:
+            # about 7.5 moves per game, so this is roughly what is left
+            n = int(min(batch_games, max(1, (rows - written) // 7)))
+            x_ids, o_ids = draw_pairings(pool, n, rng)
+            moves = np.full((n, 9), -1, dtype=np.int8)
+            play_lockstep(strategies, x_ids, o_ids, rng, moves)
+
+            lines = format_games(first_id + games, x_ids, o_ids, moves)
+            f.write(''.join(lines))
+            games += n
+            written += len(lines)
+    return games, written
+
+
+# strategies used by a worker process, loaded once when it starts
+_worker_strats = None
+
+
+def init_worker(data_file):
+    global _worker_strats
+    _worker_strats = generator_strategies(data_file)
+
+
+# write one shard in a worker process. Every shard has its own seed and range
+# of game ids, so the shards can be concatenated into one dataset
+def write_shard(task):
+    shard, pool, rows, path, seed, id_stride = task
+    return generate(_worker_strats, pool, rows, path,
+                    first_id=shard * id_stride + 1, seed=[seed, shard])
+
+
+# name of shard k of the output
+def shard_path(out, k, shards):
+    if shards == 1:
+        return out
+    root, ext = out, ''
+    for suffix in ('.csv.gz', '.csv'):
+        if out.endswith(suffix):
+            root, ext = out[:-len(suffix)], suffix
+            break
+    return f"{root}-{k:03d}{ext}"
+
+
+# write rows moves split over shards files, generated by a pool of workers
+def run_shards(pool, rows, out, shards, workers, seed=0,
+               data_file="tictactoe-data.csv"):
+    # build the artifact cache once, so the workers only load it
+    load_models(data_file)
+
+    per_shard = -(-rows // shards)
+    # a game has at least 5 moves, so a shard never has more games than this
+    id_stride = per_shard // 5 + BATCH_GAMES
+    tasks = [(k, pool, per_shard, shard_path(out, k, shards), seed, id_stride)
+             for k in range(shards)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(data_file,)) as executor:
+        return list(executor.map(write_shard, tasks))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate self-play games in the tictactoe-data.csv "
+                    "format")
+    parser.add_argument('--rows', type=int, default=1000000,
+                        help="number of moves to write, in total")
+    parser.add_argument('--players', default='trees',
+                        help="comma separated player ids, or trees, solver, "
+                             "random or mixed (all of them)")
+    parser.add_argument('--out', default='selfplay.csv',
+                        help="file to write, gzipped if it ends in .gz")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="split the output over this many files")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="number of worker processes for the shards")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed for the games")
+    args = parser.parse_args()
+
+    try:
+        pool = parse_players(args.players, generator_strategies(
+            "tictactoe-data.csv"))
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    written = run_shards(pool, args.rows, args.out, args.shards,
+                         args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+
+    games = sum(g for g, _ in written)
+    rows = sum(r for _, r in written)
+    print(f"{rows} rows of {games} games in {args.shards} file(s) in "
+          f"{elapsed:.2f}s ({rows / elapsed:.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import random
+
+import instrument
+from board import Board
+from tic_tac_toe import get_computer_move, is_game_over, load_models
+
+
+# Line protocol. Every request is one line and gets one line back:
+#
+#   players             -> OK players=<comma separated opponent ids>
+#   new <opponent> x|o  -> start a game against the opponent as X or O. If
+#                          the computer is X it moves right away
+#   move <pos>          -> play at pos (0-8), the computer answers if the
+#                          game isn't over
+#   quit                -> close the connection
+#
+# Replies to new and move look like
+#
+#   OK board=<board_to_str> cpu=<computer move or -> result=<none|x|o|tie>
+#
+# and errors like "ERR <reason>", after which the session carries on.
+
+
+class Session:
+    '''
+    State of the game one connection is playing: the board, which side the
+    human plays and the strategy of the computer opponent. Strategies are the
+    shared compiled tables, so a session only holds a Board and a few refs.
+    '''
+    __slots__ = ('board', 'human', 'opponent', 'rng')
+
+    def __init__(self, rng):
+        self.board    = None
+        self.human    = None
+        self.opponent = None
+        self.rng      = rng
+
+    # let the computer move if it is its turn and the game isn't over.
+    # Returns the move made, or None
+    def computer_turn(self):
+        if self.board.turn == self.human or is_game_over(self.board)[0]:
+            return None
+        move = get_computer_move(self.opponent, self.board,
+                                 self.board.legal_moves(), self.rng)
+        self.board.play(move)
+        return move
+
+    # reply line with the board, the computer's move and the result so far
+    def state(self, cpu_move):
+        over, winner = is_game_over(self.board)
+        result = 'none' if not over else ('tie' if winner == ' ' else winner)
+        cpu = '-' if cpu_move is None else cpu_move
+        return f"OK board={self.board.to_str()} cpu={cpu} result={result}"
+
+
+# handle one request line of a session. Returns the reply line
+def handle_request(session, strategies, line):
+    parts = line.split()
+    if not parts:
+        return "ERR empty request"
+    cmd, args = parts[0].lower(), parts[1:]
+
+    if cmd == 'players':
+        return "OK players=" + ','.join(str(i) for i in sorted(strategies))
+
+    if cmd == 'new':
+        if len(args) != 2 or not args[0].lstrip('-').isdigit():
+            return "ERR usage: new <opponent> x|o"
+        opponent, side = int(args[0]), args[1].lower()
+        if opponent not in strategies:
+            return f"ERR unknown opponent {opponent}"
+        if side not in ('x', 'o'):
+            return "ERR side must be x or o"
+        instrument.count('server.games')
+        session.board    = Board()
+        session.human    = side
+        session.opponent = strategies[opponent]
+        return session.state(session.computer_turn())
+
+    if cmd == 'move':
+        if session.board is None:
+            return "ERR no game, start one with new"
+        if is_game_over(session.board)[0]:
+            return "ERR game is over, start a new one"
+        valid_moves = [str(m) for m in session.board.legal_moves()]
+        if len(args) != 1 or args[0] not in valid_moves:
+            return "ERR valid moves are " + ','.join(valid_moves)
+        session.board.play(int(args[0]))
+        return session.state(session.computer_turn())
+
+    return f"ERR unknown command {cmd}"
+
+
+# serve one connection until it quits or goes away
+async def serve_client(reader, writer, strategies):
+    session = Session(random.Random())
+    instrument.count('server.sessions')
+    try:
+        while True:
+            line = await reader.readline()
+            if not line or line.strip().lower() == b'quit':
+                break
+            reply = handle_request(session, strategies,
+                                   line.decode('ascii', 'replace'))
+            writer.write(reply.encode() + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def run_server(host, port, strategies):
+    server = await asyncio.start_server(
+        lambda r, w: serve_client(r, w, strategies), host, port,
+        backlog=4096)
+    print(f"serving on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve games against the computer players over TCP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.setup(args)
+
+    strategies = load_models("tictactoe-data.csv")[1]
+    try:
+        asyncio.run(run_server(args.host, args.port, strategies))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import random
+
+import instrument
+import mcts
+from render import Renderer, Spectator
+from board import Board
+from dataset import load_dataset
+from openings import load_book, with_book
+from policy import compile_strategies
+from solver import SOLVER_ID, perfect_player
+from tic_tac_toe import (get_computer_move, get_results, is_game_over,
+                         load_models, train_for_strats)
+
+
+# play a single game between two strategies without printing anything.
+# Returns the winner the same way is_game_over does: 'x', 'o' or ' ' for a tie.
+# rng breaks ties between equally likely moves. rules are the mnk.Rules of
+# the game, tic tac toe if None. If a render.Spectator is given, every move
+# is shown with it
+def play_game(x_strat, o_strat, rng=random, rules=None, spectator=None):
+    board = Board() if rules is None else rules.new_board()
+
+    over, winner = False, ' '
+    while not over:
+        strat = x_strat if board.turn == 'x' else o_strat
+        board.play(get_computer_move(strat, board, board.legal_moves(), rng))
+        over, winner = is_game_over(board)
+        if spectator is not None:
+            spectator.show(board, over, winner)
+
+    instrument.count('games.simulated')
+    return winner
+
+
+# play n games with the same players on X and O. Returns the tally of
+# outcomes as {'x': x wins, 'o': o wins, 'tie': ties}. The games the
+# spectator (if any) picks are shown
+def run_games(x_strat, o_strat, n, rng=random, rules=None, spectator=None):
+    tally = {'x': 0, 'o': 0, 'tie': 0}
+    for _ in range(n):
+        watch = None
+        if spectator is not None and spectator.next_game():
+            watch = spectator
+        winner = play_game(x_strat, o_strat, rng, rules, watch)
+        tally[winner if winner != ' ' else 'tie'] += 1
+    return tally
+
+
+# turn the tallies of a set of pairings into a record for every player, in
+# the same format as Player.record
+def standings(results):
+    records = {}
+    for (x, o), tally in results.items():
+        rec_x = records.setdefault(x, {"win": 0, "loss": 0, "tie": 0})
+        rec_o = records.setdefault(o, {"win": 0, "loss": 0, "tie": 0})
+        rec_x["win"]  += tally['x']
+        rec_x["loss"] += tally['o']
+        rec_o["win"]  += tally['o']
+        rec_o["loss"] += tally['x']
+        rec_x["tie"]  += tally['tie']
+        rec_o["tie"]  += tally['tie']
+    return records
+
+
+# play n games for every (x, o) pairing given. Returns a dict keyed by the
+# pairing with the tally from run_games
+def run_pairings(strategies, pairings, n, rules=None, spectator=None):
+    return {(x, o): run_games(strategies[x], strategies[o], n, random, rules,
+                              spectator)
+            for x, o in pairings}
+
+
+# every ordered pairing of two different players, so each player gets to
+# play every other one both as X and as O
+def round_robin_pairings(player_ids):
+    return [(x, o) for x in player_ids for o in player_ids if x != o]
+
+
+# play a full round-robin of n games per pairing between all strategies
+def round_robin(strategies, n, rules=None, spectator=None):
+    return run_pairings(strategies, round_robin_pairings(sorted(strategies)), n,
+                        rules, spectator)
+
+
+# print the outcome of every pairing followed by the overall standings
+def print_results(results):
+    print(f"{'X':>3} {'O':>3} {'x-win':>7} {'o-win':>7} {'tie':>7}")
+    for (x, o), tally in sorted(results.items()):
+        print(f"{x:>3} {o:>3} {tally['x']:>7} {tally['o']:>7} {tally['tie']:>7}")
+
+    print("\nStandings")
+    for player, record in sorted(standings(results).items()):
+        print(f"{player:>3}: {record}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate games between the player models without any "
+                    "interaction")
+    parser.add_argument('-n', '--games', type=int, default=100,
+                        help="number of games to play per pairing")
+    parser.add_argument('-x', type=int, help="id of the X-player")
+    parser.add_argument('-o', type=int, help="id of the O-player")
+    parser.add_argument('--canonical', action='store_true',
+                        help="train the models on canonical (symmetry "
+                             "reduced) boards, and with --book add up the "
+                             "openings played on symmetric boards")
+    parser.add_argument('--solver', action='store_true',
+                        help=f"add the perfect player as player {SOLVER_ID}")
+    parser.add_argument('--book', action='store_true',
+                        help="players play the openings they played most in "
+                             "the data before using their model")
+    parser.add_argument('--mcts', action='store_true',
+                        help=f"add the MCTS player as player {mcts.MCTS_ID}")
+    parser.add_argument('--watch', type=int, default=0, metavar='N',
+                        help="show every Nth game move by move")
+    parser.add_argument('--fps', type=float, default=30,
+                        help="most frames per second shown with --watch, "
+                             "the others are skipped")
+    parser.add_argument('--quiet', action='store_true',
+                        help="don't print the results")
+    mcts.add_arguments(parser)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.setup(args)
+
+    if args.canonical:
+        ttt_data = load_dataset("tictactoe-data.csv")
+        player_glob = get_results(ttt_data)
+        strats = compile_strategies(
+            train_for_strats(ttt_data, player_glob, canonical=True))
+        strats[SOLVER_ID] = perfect_player()
+    else:
+        player_glob, strats = load_models("tictactoe-data.csv")
+    if not args.solver:
+        strats = {i: s for i, s in strats.items() if i != SOLVER_ID}
+    if args.mcts:
+        if args.mcts_guide is not None and args.mcts_guide not in strats:
+            parser.error(f"--mcts-guide must be a player from "
+                         f"{min(strats)} - {max(strats)}")
+        strats[mcts.MCTS_ID] = mcts.from_args(args, strats)
+    if args.book:
+        strats = with_book(strats, load_book("tictactoe-data.csv"),
+                           canonical=args.canonical)
+
+    spectator = None
+    if args.watch > 0 and not args.quiet:
+        spectator = Spectator(args.watch, Renderer(diff=True,
+                                                   min_interval=1 / args.fps))
+
+    # single pairing if both players were given, round-robin otherwise
+    if args.x is not None and args.o is not None:
+        if args.x not in strats or args.o not in strats:
+            parser.error(f"players must be from {min(strats)} - {max(strats)}")
+        results = run_pairings(strats, [(args.x, args.o)], args.games,
+                               spectator=spectator)
+    elif args.x is None and args.o is None:
+        results = round_robin(strats, args.games, spectator=spectator)
+    else:
+        parser.error("-x and -o must be given together")
+
+    if not args.quiet:
+        print_results(results)
+
+
+if __name__ == '__main__':
+    main()
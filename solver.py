@@ -0,0 +1,124 @@
+import os
+import numpy as np
+
+from board import Board
+from policy import NUM_BOARDS, PolicyTable
+from symmetry import canonical
+
+
+# id of the perfect player in the strategies dict. The players in the data
+# start at 1, so 0 is free
+SOLVER_ID = 0
+
+# values of the positions are cached here after the first solve
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'solver_values.npy')
+
+# value of a board that can't be reached in a real game
+UNREACHABLE = -2
+
+# value of the board for the player whose turn it is: 1 if they can force a
+# win, 0 for a tie, -1 if the other player can force a win
+def _negamax(b, table):
+    # the 8 symmetric versions of a board share an entry in the table
+    key = canonical(b)[0]
+    if key in table:
+        return table[key]
+
+    if b.winner() != ' ':
+        # the last move won the game
+        value = -1
+    elif b.is_full():
+        value = 0
+    else:
+        value = -1
+        for pos in b.legal_moves():
+            b.play(pos)
+            value = max(value, -_negamax(b, table))
+            b.undo(pos)
+            if value == 1:
+                break
+
+    table[key] = value
+    return value
+
+
+# solve every position reachable from the empty board. Returns an int8 array
+# with the value of each board by Board.index, UNREACHABLE for the rest
+def solve():
+    table = {}
+    values = np.full(NUM_BOARDS, UNREACHABLE, dtype=np.int8)
+
+    # walk all reachable boards and look their value up by canonical board
+    stack = [Board()]
+    while stack:
+        b = stack.pop()
+        if values[b.index()] != UNREACHABLE:
+            continue
+        values[b.index()] = _negamax(b, table)
+        if b.winner() == ' ':
+            for pos in b.legal_moves():
+                child = b.copy()
+                child.play(pos)
+                stack.append(child)
+
+    return values
+
+
+# values of all positions, from the cache file if there is one
+def load_values(cache_file=CACHE_FILE):
+    if cache_file is not None and os.path.exists(cache_file):
+        return np.load(cache_file)
+
+    values = solve()
+    if cache_file is not None:
+        np.save(cache_file, values)
+    return values
+
+
+class Solver:
+    '''
+    Perfect play for every tic tac toe position. Values are from the point of
+    view of the player whose turn it is: 1 for a forced win, 0 for a tie and
+    -1 for a forced loss. Every query is a lookup into the solved values.
+    '''
+
+    def __init__(self, values=None):
+        self.values = load_values() if values is None else values
+
+    # value of the board for the player to move
+    def value(self, b):
+        return int(self.values[b.index()])
+
+    # value of playing at pos for the player to move
+    def score_move(self, b, pos):
+        b.play(pos)
+        score = -self.value(b)
+        b.undo(pos)
+        return score
+
+    # value of every legal move, as a dict of pos -> value
+    def move_scores(self, b):
+        return {pos: self.score_move(b, pos) for pos in b.legal_moves()}
+
+    # every move that keeps the best possible outcome
+    def best_moves(self, b):
+        scores = self.move_scores(b)
+        best = max(scores.values())
+        return [pos for pos, score in scores.items() if score == best]
+
+    # the solver as a computer player for get_computer_move. Every optimal
+    # move gets prob 1, so the player picks one of them at random
+    def policy(self):
+        probs = np.zeros((NUM_BOARDS, 9))
+        for i in np.flatnonzero(self.values != UNREACHABLE).tolist():
+            b = Board.from_index(i)
+            if b.winner() == ' ' and not b.is_full():
+                probs[i, self.best_moves(b)] = 1.0
+        return PolicyTable(probs)
+
+
+# the perfect player, ready to be added to the strategies from
+# train_for_strats under SOLVER_ID
+def perfect_player():
+    return Solver().policy()
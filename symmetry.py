@@ -0,0 +1,92 @@
+import numpy as np
+
+
+# the 8 rotations and reflections of the board, as the position every cell
+# moves to. TRANSFORMS[t][c] is where cell c ends up after transform t
+TRANSFORMS = ((0, 1, 2, 3, 4, 5, 6, 7, 8),   # identity
+              (6, 3, 0, 7, 4, 1, 8, 5, 2),   # rotate 90
+              (8, 7, 6, 5, 4, 3, 2, 1, 0),   # rotate 180
+              (2, 5, 8, 1, 4, 7, 0, 3, 6),   # rotate 270
+              (2, 1, 0, 5, 4, 3, 8, 7, 6),   # flip left-right
+              (0, 3, 6, 1, 4, 7, 2, 5, 8),   # flip on main diagonal
+              (6, 7, 8, 3, 4, 5, 0, 1, 2),   # flip top-bottom
+              (8, 5, 2, 7, 4, 1, 6, 3, 0))   # flip on anti diagonal
+
+# INVERSE[t][c] is the cell that transform t moves to c, which undoes it
+INVERSE = tuple(tuple(t.index(c) for c in range(9)) for t in TRANSFORMS)
+
+_NUM_BOARDS = 3 ** 9
+_POW3 = 3 ** np.arange(9)
+_PERMS = np.array(TRANSFORMS)
+
+
+# Board.index of each row of (n, 9) encoded boards
+def encoded_index(encoded):
+    return np.asarray(encoded, dtype=np.int64) @ _POW3
+
+
+# (n, 9) encoded boards after transform t
+def transform_encoded(encoded, t):
+    out = np.empty_like(encoded)
+    out[:, list(TRANSFORMS[t])] = encoded
+    return out
+
+
+# CANONICAL[i] is the smallest index among the symmetric versions of the board
+# with index i, and CANONICAL_TRANSFORM[i] is the transform that gets there
+def _canonical_tables():
+    idx = np.arange(_NUM_BOARDS)
+    encoded = np.stack([(idx // 3 ** c) % 3 for c in range(9)], axis=1)
+    by_transform = np.stack([encoded_index(transform_encoded(encoded, t))
+                             for t in range(len(TRANSFORMS))])
+    transform = by_transform.argmin(axis=0)
+    return by_transform[transform, idx], transform
+
+
+CANONICAL, CANONICAL_TRANSFORM = _canonical_tables()
+
+
+# canonical form of a Board: (canonical index, transform from the board to it)
+def canonical(b):
+    i = b.index()
+    return int(CANONICAL[i]), int(CANONICAL_TRANSFORM[i])
+
+
+# position of a move on the canonical board, for a move made on a board
+# that was canonicalized with transform t
+def to_canonical_move(pos, t):
+    return TRANSFORMS[t][pos]
+
+
+# position on the original board of a move made on the canonical board
+def from_canonical_move(pos, t):
+    return INVERSE[t][pos]
+
+
+# canonicalize (n, 9) encoded boards. Returns the canonical boards and the
+# transforms used
+def canonical_boards(encoded):
+    encoded = np.asarray(encoded)
+    t = CANONICAL_TRANSFORM[encoded_index(encoded)]
+    boards = np.empty_like(encoded)
+    np.put_along_axis(boards, _PERMS[t], encoded, axis=1)
+    return boards, t
+
+
+# canonicalize (n, 9) encoded boards and the moves made on them. Returns the
+# canonical boards, the moves in the canonical frame and the transforms used
+def canonicalize_moves(encoded, moves):
+    boards, t = canonical_boards(encoded)
+    return boards, _PERMS[t, moves], t
+
+
+# turn move probabilities given for canonical boards back into probabilities
+# for the original boards, which were canonicalized with the transforms t
+def from_canonical_probs(probs, t):
+    return np.take_along_axis(probs, _PERMS[t], axis=1)
+
+
+# how often every canonical position shows up in (n, 9) encoded boards.
+# Returns the canonical indices and their counts
+def canonical_counts(encoded):
+    return np.unique(CANONICAL[encoded_index(encoded)], return_counts=True)
@@ -1,49 +1,40 @@
+import argparse
 import random
-import pandas as pd
+import sys
 
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.preprocessing import OneHotEncoder, LabelEncoder
+import instrument
+import mcts
+from artifact import CACHE_DIR, file_digest, load_artifact, save_artifact
+from board import Board
+from dataset import load_dataset
+from openings import BookPlayer, load_book, with_book
+from policy import PolicyTable, compile_strategies, tree_probs
+from render import board_frame
+from solver import SOLVER_ID, perfect_player
+from training import train_strategies
 
 
-# label encoding for DecisionTreeClassifier inputs
-values = list('-ox')
-label_encoder = LabelEncoder().fit(values)
+# label encoding for DecisionTreeClassifier inputs. These are the codes a
+# LabelEncoder fit on '-ox' gives, without having to import sklearn for it
+label_codes = {'-': 0, 'o': 1, 'x': 2}
 
-# take the dict representation of a board and create a str representation
-# used for predictions from the DecisionTreeClassifier
+
+# encode the str representation of a board for the DecisionTreeClassifier
+def encode_board(str_board):
+    return [label_codes[c] for c in str_board]
+
+
+# take the Board and create a str representation used for predictions from
+# the DecisionTreeClassifier
 def board_to_str(b):
-    s = ''
-    for i in range(9):
-        c = '-' if b[i] == ' ' else b[i].lower()
-        s += c
-    return s
-
-
-# pretty print board for games
-def print_board(b):
-    def print_numbered(lst):
-        # underline number
-        under = '\033[4m'
-        end   = '\033[0m'
-        s = ''
-        for num in lst:
-            s += under + num + '|' + end + '   |'
-        print(s[:-1])
-
-    # top row
-    print_numbered(['0', '1', '2'])
-    print(f'  {b[0]}  |  {b[1]}  |  {b[2]}  ')
-
-    # middle row
-    print('_____|_____|_____')
-    print_numbered(['3', '4', '5'])
-    print(f'  {b[3]}  |  {b[4]}  |  {b[5]}  ')
-
-    # bottom row
-    print('_____|_____|_____')
-    print_numbered(['6', '7', '8'])
-    print(f'  {b[6]}  |  {b[7]}  |  {b[8]}  ')
-    print()
+    return b.to_str()
+
+
+# pretty print board for games, below an optional caption. The board is
+# built as one frame (see render.py) and written at once
+@instrument.phase('print_board')
+def print_board(b, caption=''):
+    sys.stdout.write(caption + board_frame(b))
 
 
 # return the move the computer will play
@@ -51,73 +42,88 @@ def print_board(b):
 # outputted, which represent the prob that the player's strategy is to play in
 # that position. We will use this and typically play in whatever position has
 # highest prob. However, if the spot is not playable, we will take the next
-# highest. If there are any ties, we pick one of them at random
-def get_computer_move(strat, str_board, valid_pos):
+# highest. If there are any ties, we pick one of them at random using rng,
+# which can be a seeded random.Random for reproducible games
+def get_computer_move(strat, b, valid_pos, rng=random):
+    # compiled strategies look the move up instead of running the tree
+    if isinstance(strat, PolicyTable):
+        if not instrument.enabled:
+            return strat.choose(b.index(), valid_pos, rng)
+        with instrument.timed('move.table'):
+            return strat.choose(b.index(), valid_pos, rng)
+
+    # book players play from the opening book while the game is in it
+    if isinstance(strat, BookPlayer):
+        move = strat.choose(b.index(), valid_pos, rng)
+        if move is not None:
+            return move
+        return get_computer_move(strat.fallback, b, valid_pos, rng)
+
+    # the MCTS player searches from the board
+    if isinstance(strat, mcts.MCTS):
+        with instrument.timed('move.mcts'):
+            return strat.choose(b, valid_pos, rng)
+
     # encode board for predictions
-    encoded = label_encoder.transform(list(str_board))
-    # probabilities
-    s = strat.predict_proba([encoded])[0]
+    with instrument.timed('move.encode'):
+        encoded = encode_board(board_to_str(b))
+    # probabilities, through the canonical board for canonical trees
+    with instrument.timed('move.predict'):
+        s = tree_probs(strat, [encoded])[0]
     # tuple of (prob, index) for all valid positions
-    options = [(s[int(i)], i) for i in valid_pos]
+    options = [(s[i], i) for i in valid_pos]
     # highest prob
     m = max(options, key= lambda x: x[0])[0]
     # return position that is valid w/ highest prob
-    return random.choice([k for i, (j, k) in enumerate(options) if j == m])
+    return rng.choice([k for i, (j, k) in enumerate(options) if j == m])
 
 
 # checks board to see if game is over. Return is (bool, winner)
 def is_game_over(b):
-    # offset by 1 for indexing
-    winning_combos = [[0, 1, 2], [3, 4, 5], [6, 7, 8], # horizontal
-                      [0, 3, 6], [1, 4, 7], [2, 5, 8], # vertical
-                      [0, 4, 8], [2, 4, 6]]            # diagonal
-
-    # check if game is over because of a winning combo
-    for combo in winning_combos:
-        c1, c2, c3 = combo
-        if (b[c1] == b[c2]) and (b[c2] == b[c3]) and (b[c1] != ' '):
-            return (True, b[c1].lower())
+    # game is over because of a winning combo, or bc no more spots to play
+    winner = b.winner()
+    return (winner != ' ' or b.is_full(), winner)
 
-    # check if game is over because board is full
-    for k, v in b.items():
-        if v == ' ':
-            # game can continue
-            return (False, ' ')
 
-    # game is over bc no more spots to play
-    return (True, ' ')
+# how a computer player is shown in the menus: its record for players from
+# the data, or what it is for the other ones (the perfect and MCTS players)
+def describe_player(players, strategies, i):
+    if i in players:
+        return players[i].record
+    if isinstance(strategies[i], mcts.MCTS):
+        return strategies[i].describe()
+    return "perfect play"
 
 
-# game played between two existing players
-def simulate_game(players, strategies):
+# game played between two existing players. Every move is shown as a single
+# frame, or not at all if quiet
+def simulate_game(players, strategies, quiet=False):
     # choose player to be x
     print("\nPick X-player")
-    for i in range(1, 10+1):
-        print(f"{i}: {players[i].record}")
+    for i in sorted(strategies):
+        print(f"{i}: {describe_player(players, strategies, i)}")
     # get x-player strategy
     x = input("\nENTER -> ").strip()
-    while x not in [str(i) for i in range(1, 10+1)]:
-        print("Invalid input: Must be player from 1 - 10")
+    while x not in [str(i) for i in strategies]:
+        print(f"Invalid input: Must be player from "
+              f"{min(strategies)} - {max(strategies)}")
         x = input("\nENTER -> ").strip()
     x_strat = strategies[int(x)]
 
     # choose player to be o
     print("\nPick O-player")
-    rem_players = [j for j in range(1, 10+1) if j != int(x)]
+    rem_players = [j for j in sorted(strategies) if j != int(x)]
     for i in rem_players:
-        print(f"{i}: {players[i].record}")
+        print(f"{i}: {describe_player(players, strategies, i)}")
     # get o-player strategy
     o = input("\nENTER -> ").strip()
     while o not in [str(i) for i in rem_players]:
-        print("Invalid input: Must be player from 1 - 10")
+        print(f"Invalid input: Must be player from "
+              f"{min(strategies)} - {max(strategies)}")
         o = input("\nENTER -> ").strip()
     o_strat = strategies[int(o)]
 
-    board = empty_board = { 0: ' ', 1: ' ', 2: ' ',
-                            3: ' ', 4: ' ', 5: ' ',
-                            6: ' ', 7: ' ', 8: ' ' }
-    valid_moves = ['0', '1', '2', '3', '4', '5', '6', '7', '8',
-                   'n', 'q']
+    board = Board()
     turn  = 'x'
 
     # start game
@@ -125,28 +131,24 @@ def simulate_game(players, strategies):
 
         if turn == 'x':
             # get move
-            str_board = board_to_str(board)
-            move = get_computer_move(x_strat, str_board, valid_moves[:-2])
-            # make move and rmeove from valid options
-            board[int(move)] = 'X'
-            valid_moves.remove(move)
+            move = get_computer_move(x_strat, board, board.legal_moves())
+            # make move
+            board.play(move)
             # switch turn and display board
             turn = 'o'
-            print(f"Player {x} made move at {move}" )
-            print_board(board)
+            if not quiet:
+                print_board(board, f"Player {x} made move at {move}\n")
 
         # o move
         else:
             # get move
-            str_board = board_to_str(board)
-            move = get_computer_move(o_strat, str_board, valid_moves[:-2])
-            # make move and rmeove from valid options
-            board[int(move)] = 'O'
-            valid_moves.remove(move)
+            move = get_computer_move(o_strat, board, board.legal_moves())
+            # make move
+            board.play(move)
             # switch turn and display board
             turn = 'x'
-            print(f"Player {o} made move at {move}" )
-            print_board(board)
+            if not quiet:
+                print_board(board, f"Player {o} made move at {move}\n")
 
     # when game is done, print outcome, and finish
     winner = is_game_over(board)[1]
@@ -159,16 +161,19 @@ def simulate_game(players, strategies):
     return
 
 
-# game played between user and an existing player
+# game played between user and an existing player. Returns True if the user
+# asked for a new game, which the caller starts (instead of this function
+# calling itself, which would keep growing the stack)
 def one_player_game(name, players, potential_opponents):
     # pick opponent to play against
     print("\nPick Opponent")
-    for i in range(1, 10+1):
-        print(f"{i}: {players[i].record}")
+    for i in sorted(potential_opponents):
+        print(f"{i}: {describe_player(players, potential_opponents, i)}")
 
     opponent = input("\nENTER -> ").strip()
-    while opponent not in [str(i) for i in range(1, 10+1)]:
-        print("Invalid input: Must be opponent from 1 - 10")
+    while opponent not in [str(i) for i in potential_opponents]:
+        print(f"Invalid input: Must be opponent from "
+              f"{min(potential_opponents)} - {max(potential_opponents)}")
         opponent = input("\nENTER -> ").strip()
 
     opp_strategy = potential_opponents[int(opponent)]
@@ -180,9 +185,7 @@ def one_player_game(name, players, potential_opponents):
         x_OR_o = input("ENTER -> ").lower().strip()
 
     print(f"\nGood luck, {name}!")
-    board = empty_board = { 0: ' ', 1: ' ', 2: ' ',
-                    3: ' ', 4: ' ', 5: ' ',
-                    6: ' ', 7: ' ', 8: ' ' }
+    board = Board()
     valid_moves = ['0', '1', '2', '3', '4', '5', '6', '7', '8',
                    'n', 'q']
     turn  = 'x'
@@ -209,7 +212,7 @@ def one_player_game(name, players, potential_opponents):
 
             # if move is a position on board
             if move in valid_moves[:-2]:
-                board[int(move)] = 'X' if x_OR_o == 'x' else 'O'
+                board.play(int(move))
                 valid_moves.remove(move)
 
             # other choices
@@ -221,8 +224,7 @@ def one_player_game(name, players, potential_opponents):
                         print('\nResponse must be [y]es or [n]o')
                         confirm = input('\nAre you sure you want to play new game? ').strip()
                     if confirm == 'y':
-                        one_player_game(name, players, potential_opponents)
-                        return
+                        return True
                     elif confirm == 'n':
                         continue
 
@@ -241,10 +243,9 @@ def one_player_game(name, players, potential_opponents):
             print_board(board)
 
         else:
-            str_board = board_to_str(board)
-            move = get_computer_move(opp_strategy, str_board, valid_moves[:-3])
-            board[int(move)] = 'X' if x_OR_o != 'x' else 'O'
-            valid_moves.remove(move)
+            move = get_computer_move(opp_strategy, board, board.legal_moves())
+            board.play(move)
+            valid_moves.remove(str(move))
             turn = 'player'
             print(f"Computer made move at {move}" )
             print('\n\n')
@@ -267,11 +268,10 @@ def one_player_game(name, players, potential_opponents):
     return
 
 
-# game played between two users
+# game played between two users. Returns True if they asked for a new game,
+# like one_player_game
 def two_player_game(x_name, o_name):
-    board = empty_board = { 0: ' ', 1: ' ', 2: ' ',
-                    3: ' ', 4: ' ', 5: ' ',
-                    6: ' ', 7: ' ', 8: ' ' }
+    board = Board()
     valid_moves = ['0', '1', '2', '3', '4', '5', '6', '7', '8',
                    'n', 'q']
     turn  = 'x'
@@ -292,7 +292,7 @@ def two_player_game(x_name, o_name):
 
             # if move is a position on board
             if move in valid_moves[:-2]:
-                board[int(move)] = 'X'
+                board.play(int(move))
                 valid_moves.remove(move)
 
             else:
@@ -303,8 +303,7 @@ def two_player_game(x_name, o_name):
                         print('\nResponse must be [y]es or [n]o')
                         confirm = input('\nAre you sure you want to play new game? ').strip()
                     if confirm == 'y':
-                        two_player_game(x_name, o_name)
-                        return
+                        return True
                     elif confirm == 'n':
                         continue
 
@@ -335,7 +334,7 @@ def two_player_game(x_name, o_name):
 
             # if move is a position on board
             if move in valid_moves[:-2]:
-                board[int(move)] = 'O'
+                board.play(int(move))
                 valid_moves.remove(move)
 
             else:
@@ -346,8 +345,7 @@ def two_player_game(x_name, o_name):
                         print('\nResponse must be [y]es or [n]o')
                         confirm = input('\nAre you sure you want to play new game? ').strip()
                     if confirm == 'y':
-                        two_player_game(x_name, o_name)
-                        return
+                        return True
                     elif confirm == 'n':
                         continue
 
@@ -397,7 +395,7 @@ class Player:
                                    7: {'x':5, 'o':5}, 8: {'x':5, 'o':5},
                                    9: {'x':5, 'o':5}, 10: {'x':5, 'o':5}}
         # can't play yourself!
-        del self.rr_remaining_games[player_id]
+        self.rr_remaining_games.pop(player_id, None)
 
     # calculate win % from payers record
     def calc_win_pct(self):
@@ -408,6 +406,8 @@ class Player:
     # update data fields once the game is over
     def game_over(self, game_id, game_moves, opponent_id, xo):
         self.games_played += 1
+        # players outside the original 10 haven't got a round-robin schedule
+        self.rr_remaining_games.setdefault(opponent_id, {'x':5, 'o':5})
         self.rr_remaining_games[opponent_id][xo] -= 1
         if xo == 'x':
             self.moves_as_x[game_id] = game_moves
@@ -415,6 +415,17 @@ class Player:
             self.moves_as_o[game_id] = game_moves
         self.calc_win_pct()
 
+    # fields of the player as a plain dict (used for caching)
+    def to_dict(self):
+        return dict(vars(self))
+
+    # rebuild a player from the dict made by to_dict
+    @classmethod
+    def from_dict(cls, fields):
+        player = cls.__new__(cls)
+        player.__dict__.update(fields)
+        return player
+
     # print out attributes of player (used for debugging)
     def player_print(self):
         print(f"id: {self.player_id}")
@@ -440,37 +451,34 @@ class Game:
     '''
     The Game class for the tic tac toe data. The fields in the Game class
     include the game_id, what Player is x and which is o, what moves those
-    players made, and who won the game.
+    players made, and who won the game. The moves are replayed on a Board (or
+    the MNKBoard of a bigger game) as they come in, so the winner is known as
+    soon as the winning move is made.
     '''
-    def __init__(self, game_id, player_x, player_o):
+    def __init__(self, game_id, player_x, player_o, board=None):
         self.game_id  = game_id
         self.player_x = player_x
         self.player_o = player_o
         self.moves_x  = []
         self.moves_o  = []
         self.winner   = None
+        self.board    = Board() if board is None else board
 
     # update move fields
     def update_moves(self, move_id, move):
         # x move
         if move_id % 2 == 1:
             self.moves_x.append(move)
+            self.board.put(move, 'x')
         # o move
         else:
             self.moves_o.append(move)
+            self.board.put(move, 'o')
 
     # determine what player won game
     def find_winner(self):
-        # offset by 1 for indexing
-        winning_combos = [[0, 1, 2], [3, 4, 5], [6, 7, 8], # horizontal
-                          [0, 3, 6], [1, 4, 7], [2, 5, 8], # vertical
-                          [0, 4, 8], [2, 4, 6]]            # diagonal
-
-        for combo in winning_combos:
-            if set(combo).issubset(set(self.moves_x)):
-                self.winner = 'x'
-            elif set(combo).issubset(set(self.moves_o)):
-                self.winner = 'o'
+        winner = self.board.winner()
+        self.winner = winner if winner != ' ' else None
 
     # if game is over update fields of the Players in the Game
     def game_over(self):
@@ -506,96 +514,86 @@ class Game:
         file.write(f"winner:{self.winner}\n")
 
 
-# train a decision tree to predict the players moves from moves made
-# on specific board placements to learn playing tendencies
-def train_for_strats(data, players):
-
-    dt = DecisionTreeClassifier()
-
-
-    X = {1: [], 2: [], 3: [], 4: [], 5: [],
-         6: [], 7: [], 8: [], 9: [], 10: []}
-    Y = {1: [], 2: [], 3: [], 4: [], 5: [],
-         6: [], 7: [], 8: [], 9: [], 10: []}
-
-    for i in range(1, 220+1):
-        temp_data = data.loc[data['game_id'] == i]
-
-        x_player = temp_data['player_x_id'].iloc[0]
-        o_player = temp_data['player_o_id'].iloc[0]
-
-        #x_OR_o = 'x' if (temp_data['player_x_id'].iloc[0] == 3) else 'o'
-
-        Y[x_player] += players[x_player].moves_as_x[i]
-        Y[o_player] += players[o_player].moves_as_o[i]
-
-        for row in temp_data.iterrows():
-            r = row[1]
-            if (r['move_id'] % 2 == 1):
-                X[x_player].append([r['pre_state']])
-
-            else:
-                X[o_player].append([r['pre_state']])
-
-    for i in range(1,10+1):
-        X[i] = [label_encoder.transform(list(x[0])) for x in X[i]]
-
-    strategy = {1: None, 2: None, 3: None, 4: None, 5: None,
-                6: None, 7: None, 8: None, 9: None, 10: None}
-
-    for i in range(1, 10+1):
-        strategy[i] = dt.fit(X[i], Y[i])
-
-    return strategy
+# train a decision tree for every player to predict the players moves from
+# moves made on specific board placements to learn playing tendencies. seed
+# fixes the random_state of the trees so separate processes train identical
+# models. With canonical=True every board is first turned into its canonical
+# form (see symmetry.py), so the moves seen on symmetric boards are learned
+# together. With workers > 1 the trees are fit in parallel processes
+@instrument.phase('train_for_strats')
+def train_for_strats(data, players, seed=None, canonical=False, workers=1):
+    return train_strategies(data, players.keys(), seed, canonical, workers)
 
 
 # creates Games and Players andparses through data and to see what the results
 # of the tictactoe games were in the dataset. Returns the Player classes for
-# each player.
-def get_results(data):
+# each player. The results are written to out_file unless it is None. rules
+# are the mnk.Rules of the game, tic tac toe if None
+@instrument.phase('get_results')
+def get_results(data, out_file='results.txt', rules=None):
     # Find results of games played in the dataset
     game_glob   = {}
-    player_glob = {1: Player(1), 2: Player(2), 3: Player(3), 4: Player(4),
-                   5: Player(5), 6: Player(6), 7: Player(7), 8: Player(8),
-                   9: Player(9), 10: Player(10)}
+    player_glob = {i: Player(i) for i in data.player_ids()}
 
-    for i in range(1, 220+1):
+    for i, x_id, o_id, move_ids, moves in data.games():
         # initialize game info
-        temp_data = data.loc[data['game_id'] == i]
-        player_x  = player_glob[temp_data['player_x_id'].iloc[0]]
-        player_o  = player_glob[temp_data['player_o_id'].iloc[0]]
-        game = Game(i, player_x, player_o)
+        player_x  = player_glob[x_id]
+        player_o  = player_glob[o_id]
+        board = None if rules is None else rules.new_board()
+        game = Game(i, player_x, player_o, board)
 
         # play moves
-        for row in temp_data.iterrows():
-            r = row[1]
-            game.update_moves(r['move_id'], r['move'])
+        for move_id, move in zip(move_ids, moves):
+            game.update_moves(move_id, move)
 
         # end game
         game.game_over()
         game_glob[i] = game
-        player_glob[player_x.player_id] = player_x
-        player_glob[player_o.player_id] = player_o
 
-    f = open('results.txt', 'w')
-    for i in sorted(player_glob.keys()):
-        player_glob[i].player_write(f)
+    if out_file is not None:
+        f = open(out_file, 'w')
+        for i in sorted(player_glob.keys()):
+            player_glob[i].player_write(f)
 
-        # Display results in the results.txt file
-        f.write('\n\n')
-    f.close()
+            # Display results in the results.txt file
+            f.write('\n\n')
+        f.close()
 
     return player_glob
 
 
-# Given the number of players as input, executes the appropriate type of game
-def play_tic_tac_toe(num_of_players, player_glob, data):
+# the Players and the computer players (the compiled strategies and the perfect
+# player) for the data in data_file. They are loaded from the artifact cache
+# if it was built from the same data, otherwise they are built from scratch
+# and cached for the next time
+@instrument.phase('load_models')
+def load_models(data_file, cache_dir=CACHE_DIR):
+    digest = file_digest(data_file)
+    cached = load_artifact(cache_dir, digest)
+    if cached is not None:
+        standings, strats = cached
+        player_glob = {i: Player.from_dict(d) for i, d in standings.items()}
+        return player_glob, strats
+
+    data = load_dataset(data_file)
+    player_glob = get_results(data)
+    trees = train_for_strats(data, player_glob, seed=0)
+    strats = compile_strategies(trees)
+    strats[SOLVER_ID] = perfect_player()
+
+    standings = {i: p.to_dict() for i, p in player_glob.items()}
+    save_artifact(cache_dir, digest, standings, trees, strats)
+    return player_glob, strats
+
+
+# Given the number of players as input, executes the appropriate type of game.
+# quiet only shows the outcome of simulated games
+def play_tic_tac_toe(num_of_players, player_glob, strats, quiet=False):
     if num_of_players == '0':
-        strats = train_for_strats(data, player_glob)
 
         still_playing = True
         while still_playing:
-            simulate_game(player_glob, strats)
+            simulate_game(player_glob, strats, quiet)
 
             still_playing = input("\nWould you like to simulate again? ").strip()
             while still_playing not in ['y', 'n']:
@@ -609,11 +607,11 @@ def play_tic_tac_toe(num_of_players, player_glob, data):
     elif num_of_players == '1':
 
         name   = input("\nEnter your name -> ").strip().title()
-        strats = train_for_strats(data, player_glob)
 
         still_playing = True
         while still_playing:
-            one_player_game(name, player_glob, strats)
+            while one_player_game(name, player_glob, strats):
+                pass
 
             still_playing = input("\nWould you like to play again? ").strip()
             while still_playing not in ['y', 'n']:
@@ -630,7 +628,8 @@ def play_tic_tac_toe(num_of_players, player_glob, data):
 
         still_playing = True
         while still_playing:
-            two_player_game(x, o)
+            while two_player_game(x, o):
+                pass
 
             still_playing = input("\nWould you like to play again? ").strip()
             while still_playing not in ['y', 'n']:
@@ -643,9 +642,16 @@ def play_tic_tac_toe(num_of_players, player_glob, data):
 
 # Main function. Play Tic-Tac-Toe
 def main():
-    ttt_data = pd.read_csv("tictactoe-data.csv")
-    player_glob = get_results(ttt_data)
-
+    parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe")
+    parser.add_argument('--book', action='store_true',
+                        help="computer players play the openings they played "
+                             "most in the data before using their model")
+    parser.add_argument('--quiet', action='store_true',
+                        help="only show the outcome of simulated games")
+    mcts.add_arguments(parser)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.setup(args)
 
     # TIME TO PLAY GAME!!
     # How many players playing?
@@ -656,7 +662,19 @@ def main():
         print("\nInvalid input: Must be simulated (0) or 1 or 2 players\n")
         num_players = input("ENTER -> ").strip()
 
-    play_tic_tac_toe(num_players, player_glob, ttt_data)
+    # 2 players don't need the computer players, so only load them otherwise
+    if num_players == '2':
+        player_glob, strats = None, None
+    else:
+        player_glob, strats = load_models("tictactoe-data.csv")
+        if args.mcts_guide is not None and args.mcts_guide not in strats:
+            parser.error(f"--mcts-guide must be a player from "
+                         f"{min(strats)} - {max(strats)}")
+        strats[mcts.MCTS_ID] = mcts.from_args(args, strats)
+        if args.book:
+            strats = with_book(strats, load_book("tictactoe-data.csv"))
+
+    play_tic_tac_toe(num_players, player_glob, strats, args.quiet)
 
     print("Bye! Thanks for playing!\n")
 
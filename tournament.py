@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation import print_results, round_robin_pairings, run_games
+from tic_tac_toe import load_models
+
+
+# strategies used by the games played in a worker process. They are loaded
+# once by init_worker when the process starts, instead of with every task
+_worker_strats = None
+
+
+# load the strategies for this worker from the artifact cache. The policy
+# tables are memory mapped, so all the workers share the same pages
+def init_worker(data_file):
+    global _worker_strats
+    _worker_strats = load_models(data_file)[1]
+
+
+# random generator for a task. It only depends on the tournament seed and the
+# task itself, so the games are the same no matter which worker plays them
+def task_rng(seed, x, o, chunk):
+    return random.Random(f"{seed}:{x}:{o}:{chunk}")
+
+
+# play one chunk of games of a pairing in a worker process
+def play_task(task):
+    x, o, chunk, n, seed = task
+    return (x, o), run_games(_worker_strats[x], _worker_strats[o], n,
+                             task_rng(seed, x, o, chunk))
+
+
+# split n games of every pairing into tasks of at most chunk_size games
+def make_tasks(pairings, n, chunk_size, seed):
+    tasks = []
+    for x, o in pairings:
+        for chunk, start in enumerate(range(0, n, chunk_size)):
+            tasks.append((x, o, chunk, min(chunk_size, n - start), seed))
+    return tasks
+
+
+# add up the tallies of all the tasks that belong to the same pairing
+def merge_tallies(task_results):
+    results = {}
+    for pairing, tally in task_results:
+        total = results.setdefault(pairing, {'x': 0, 'o': 0, 'tie': 0})
+        for k, v in tally.items():
+            total[k] += v
+    return results
+
+
+# play n games for each pairing across a pool of worker processes. Returns the
+# same per-pairing tallies as simulation.run_pairings. For a given seed and
+# chunk size the result doesn't depend on the number of workers
+def run_tournament(pairings, n, workers=None, chunk_size=250, seed=0,
+                   data_file="tictactoe-data.csv"):
+    # build the cache once up front, so the workers only have to load it
+    load_models(data_file)
+
+    tasks = make_tasks(pairings, n, chunk_size, seed)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(data_file,)) as pool:
+        return merge_tallies(pool.map(play_task, tasks))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play a round-robin between the player models across "
+                    "several processes")
+    parser.add_argument('-n', '--games', type=int, default=1000,
+                        help="number of games to play per pairing")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument('--chunk-size', type=int, default=250,
+                        help="number of games in a single task")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed for the games, same seed -> same results")
+    args = parser.parse_args()
+
+    # every player from the data (not the perfect player)
+    player_glob = load_models("tictactoe-data.csv")[0]
+    pairings = round_robin_pairings(sorted(player_glob))
+    start = time.perf_counter()
+    results = run_tournament(pairings, args.games, args.workers,
+                             args.chunk_size, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print_results(results)
+    total = len(pairings) * args.games
+    print(f"\n{total} games in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} games/s on {args.workers} workers)")
+
+
+if __name__ == '__main__':
+    main()
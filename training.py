@@ -0,0 +1,84 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dataset import load_dataset
+from symmetry import canonicalize_moves
+
+
+# fit the tree of a single player on the boards they saw and the moves they
+# made. The fit time and the accuracy on the training moves are kept on the
+# tree as fit_time and train_accuracy. max_depth limits the depth of the tree
+def fit_strategy(boards, moves, seed=None, canonical=False, max_depth=None):
+    # sklearn is only imported once something is trained, so loading the
+    # cached models doesn't pay for it
+    from sklearn.tree import DecisionTreeClassifier
+
+    if canonical:
+        boards, moves, _ = canonicalize_moves(boards, moves)
+
+    dt = DecisionTreeClassifier(random_state=seed, max_depth=max_depth)
+    dt.canonical = canonical
+
+    start = time.perf_counter()
+    dt.fit(boards, moves)
+    dt.fit_time = time.perf_counter() - start
+    dt.train_accuracy = dt.score(boards, moves)
+    return dt
+
+
+# train a separate tree for every player in player_ids. With more than one
+# worker the trees are fit in parallel in a pool of processes. Returns a dict
+# of player id -> tree
+def train_strategies(data, player_ids, seed=None, canonical=False, workers=1):
+    player_ids = sorted(player_ids)
+    jobs = []
+    for i in player_ids:
+        made_move = data.mover == i
+        jobs.append((data.pre[made_move], data.move[made_move]))
+
+    if workers == 1:
+        trees = [fit_strategy(b, m, seed, canonical) for b, m in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fit_strategy, b, m, seed, canonical)
+                       for b, m in jobs]
+            trees = [f.result() for f in futures]
+
+    return dict(zip(player_ids, trees))
+
+
+# print the fit time and training accuracy of every strategy
+def print_report(strategies):
+    print(f"{'player':>6} {'moves':>7} {'fit ms':>8} {'accuracy':>9}")
+    for i, dt in sorted(strategies.items()):
+        print(f"{i:>6} {int(dt.tree_.n_node_samples[0]):>7} "
+              f"{dt.fit_time * 1000:>8.2f} {dt.train_accuracy:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the player models and report how they fit")
+    parser.add_argument('--data', default="tictactoe-data.csv",
+                        help="csv file with the games")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="number of processes to train with")
+    parser.add_argument('--canonical', action='store_true',
+                        help="train on canonical (symmetry reduced) boards")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="random_state of the trees")
+    args = parser.parse_args()
+
+    data = load_dataset(args.data)
+    start = time.perf_counter()
+    strategies = train_strategies(data, data.player_ids(), args.seed,
+                                  args.canonical, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print_report(strategies)
+    print(f"\ntrained {len(strategies)} models in {elapsed:.2f}s "
+          f"on {args.workers} workers")
+
+
+if __name__ == '__main__':
+    main()